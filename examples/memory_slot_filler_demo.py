@@ -15,7 +15,7 @@ from dotenv import load_dotenv
 from pathlib import Path
 import uuid
 
-from supabase import create_client, Client
+from supabase import acreate_client, AsyncClient
 
 from src.memory.persistent_memory import PersistentMemory
 from src.slot_filler.slot_filler_factory import SlotFillerFactory, SlotFiller
@@ -32,8 +32,8 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-def create_supabase_client() -> Client:
-    """Create and return a Supabase client."""
+async def create_supabase_client() -> AsyncClient:
+    """Create and return an async Supabase client."""
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_ROLE")
     
@@ -42,7 +42,7 @@ def create_supabase_client() -> Client:
             "SUPABASE_URL and SUPABASE_SERVICE_ROLE environment variables must be set"
         )
     
-    return create_client(url, key)
+    return await acreate_client(url, key)
 
 
 def extract_location(text: str) -> Optional[str]:
@@ -72,7 +72,7 @@ async def demo_conversation(
     """Runs a demo conversation with memory and slot filling."""
     # Create Supabase client
     try:
-        db = create_supabase_client()
+        db = await create_supabase_client()
         logger.info("Supabase client created successfully")
     except Exception as e:
         logger.error(f"Failed to create Supabase client: {e}")
@@ -186,7 +186,7 @@ async def demo_conversation(
         print(f"  {i+1}. {msg['role'].upper()}: {msg['content']}")
     
     # Get recently stored interactions
-    interactions = memory.get_recent_interactions(limit=3)
+    interactions = await memory.get_recent_interactions(limit=3)
     print(f"Recent interactions ({len(interactions)}):")
     for i, interaction in enumerate(interactions):
         print(f"  {i+1}. {interaction['type']} at {interaction['timestamp']}")
@@ -1,8 +1,12 @@
 """Tracing utilities for ADK agents."""
 from __future__ import annotations
 
+import atexit
 import logging
+import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Literal, Optional, Union
 
 # Configure basic logging
@@ -11,6 +15,21 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
+# Background writer for file tracing; None when tracing to stdout or disabled
+_listener: Optional[QueueListener] = None
+
+def _stop_listener() -> None:
+    """Flush pending trace records and stop the background writer."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(_stop_listener)
+
 def enable_tracing(
     output: Union[Literal["stdout"], str, None] = None,
     level: int = logging.INFO,
@@ -22,24 +41,37 @@ def enable_tracing(
             a file path string, or None to disable tracing.
         level: The logging level to use.
     """
+    global _listener
     logger = logging.getLogger("google.adk")
     logger.setLevel(level)
     
     # Clear existing handlers
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    _stop_listener()
+    
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     
     if output == "stdout":
         handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(formatter)
     elif output is not None:
-        handler = logging.FileHandler(output)
+        directory = os.path.dirname(os.path.abspath(output))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        # The file stays open on a single writer thread fed by a queue, so
+        # tracing calls never block on disk I/O
+        file_handler = logging.FileHandler(output)
+        file_handler.setFormatter(formatter)
+        _listener = QueueListener(queue.SimpleQueue(), file_handler)
+        _listener.start()
+        handler = QueueHandler(_listener.queue)
     else:
         # No output specified, return without adding handlers
         return
     
     handler.setLevel(level)
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
     logger.addHandler(handler)
     
     logger.info("Tracing enabled for ADK agents")
\ No newline at end of file
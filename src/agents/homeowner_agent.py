@@ -7,7 +7,7 @@ import datetime
 from typing import Dict, Any, List, Optional, Callable
 import asyncio
 
-from supabase import Client
+from supabase import AsyncClient
 from google.adk.conversation import Agent, Response, Message, ConversationHandler
 
 from src.memory.persistent_memory import PersistentMemory
@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 class HomeownerAgent(MemoryEnabledAgent):
     """Agent for homeowners with memory persistence and slot filling."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         """Initialize with database connection."""
         super().__init__(db)
         self.project_types = [
@@ -29,7 +29,7 @@ class MemoryEnabledAgent:
         """Initialize agent.
         
         Args:
-            db: Database client (Supabase)
+            db: Async Supabase client (supabase.AsyncClient)
         """
         self.db = db
         self._memories = {}  # Cache of PersistentMemory instances by user_id
@@ -1,7 +1,7 @@
 """Persistent memory implementation for InstaBids agents."""
 import json
 import logging
-from typing import Any, Dict, Optional, List, Set
+from typing import Any, Dict, Optional, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +114,45 @@ class PersistentMemory:
         self._memory_cache.clear()
         self._is_dirty = True
     
+    async def add_interaction(self, interaction_type: str, data: Dict[str, Any]) -> bool:
+        """Record a user interaction.
+        
+        Args:
+            interaction_type: Type of interaction (e.g., "conversation")
+            data: Data associated with the interaction
+            
+        Returns:
+            True if successfully recorded, False otherwise
+        """
+        return await self.add_interactions_bulk([(interaction_type, data)])
+    
+    async def add_interactions_bulk(self, interactions: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Record several user interactions with a single insert.
+        
+        Args:
+            interactions: List of (interaction_type, data) pairs
+            
+        Returns:
+            True if successfully recorded, False otherwise
+        """
+        if not interactions:
+            return True
+        
+        rows = [
+            {
+                "user_id": self.user_id,
+                "interaction_type": interaction_type,
+                "interaction_data": data
+            }
+            for interaction_type, data in interactions
+        ]
+        try:
+            self.db.table("user_memory_interactions").insert(rows).execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error recording interactions for user {self.user_id}: {e}")
+            return False
+    
     async def load_state(self, state: 'ConversationState') -> None:
         """Load conversation state from memory.
         
@@ -5,16 +5,37 @@ This module provides functions for analyzing images and extracting structured
 information such as labels, object detection, and dimensions.
 '''
 import os
+import io
 import json
 import base64
+import asyncio
 from typing import Dict, List, Any, Tuple, Optional
 from pathlib import Path
 
 from openai import AsyncOpenAI
+from PIL import Image, UnidentifiedImageError
 
 # Initialize the OpenAI client
 client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
+def _image_dimensions(image_bytes: bytes) -> Tuple[int, int]:
+    '''
+    Read (width, height) from the image header without decoding pixel data.
+    
+    Returns (0, 0) if Pillow cannot identify the image format.
+    '''
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as im:
+            return im.size
+    except (UnidentifiedImageError, OSError):
+        return (0, 0)
+
+def _load_image(image_path: str) -> Tuple[str, Tuple[int, int]]:
+    '''Read an image file, returning its base64 encoding and dimensions.'''
+    with open(image_path, "rb") as image_file:
+        image_bytes = image_file.read()
+    return base64.b64encode(image_bytes).decode('utf-8'), _image_dimensions(image_bytes)
+
 async def analyse(image_path: str) -> Dict[str, Any]:
     '''
     Analyze an image using OpenAI's GPT-4o Vision API.
@@ -33,9 +54,9 @@ async def analyse(image_path: str) -> Dict[str, Any]:
     if not Path(image_path).exists():
         raise FileNotFoundError(f"Image file not found: {image_path}")
     
-    # Read and encode the image
-    with open(image_path, "rb") as image_file:
-        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+    # Read and encode the image; dimensions come from the local header so the
+    # API call is only needed for labels
+    base64_image, dimensions = await asyncio.to_thread(_load_image, image_path)
     
     try:
         # Call the OpenAI API with the vision model
@@ -102,9 +123,6 @@ async def analyse(image_path: str) -> Dict[str, Any]:
         tool_call = response.choices[0].message.tool_calls[0]
         result = json.loads(tool_call.function.arguments)
         
-        # Add image dimensions if available
-        dimensions = getattr(response.usage, "image_size", (0, 0))
-        
         return {
             "labels": result.get("labels", []),
             "description": result.get("description", ""),
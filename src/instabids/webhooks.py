@@ -13,18 +13,19 @@ class _PushBus:
     def __init__(self):
         self._subs: dict[str, set[asyncio.Queue]] = {}
 
-    def subscribe(self, task_id: str):
+    async def subscribe(self, task_id: str):
         q = asyncio.Queue()
         self._subs.setdefault(task_id, set()).add(q)
         try:
             while True:
                 yield await q.get()
         finally:
-            self._subs[task_id].discard(q)
+            self._subs.get(task_id, set()).discard(q)
 
     async def publish(self, task_id: str, event: dict):
-        for q in self._subs.get(task_id, []):
-            await q.put(event)
+        # snapshot: subscribers may unsubscribe while we are awaiting puts
+        targets = tuple(self._subs.get(task_id, ()))
+        await asyncio.gather(*[q.put(event) for q in targets])
 
 
 push_to_ui = _PushBus()
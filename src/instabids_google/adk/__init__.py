@@ -4,6 +4,14 @@ Agent Development Kit (ADK) module.
 This module provides the core components for building AI agents.
 """
 
+from .flow_sessions import FlowSessionStore, InMemoryFlowSessionStore, RedisFlowSessionStore
 from .llm_agent import LLMAgent
+from .response_cache import LLMResponseCache
 
-__all__ = ["LLMAgent"]
\ No newline at end of file
+__all__ = [
+    "FlowSessionStore",
+    "InMemoryFlowSessionStore",
+    "LLMAgent",
+    "LLMResponseCache",
+    "RedisFlowSessionStore",
+]
\ No newline at end of file
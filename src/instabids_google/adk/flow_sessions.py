@@ -0,0 +1,145 @@
+"""
+Flow session storage for LLM agents.
+
+This module provides the storage backends behind LLMAgent's flow sessions:
+a process-local store and a Redis-backed store that lets flows resume on
+any worker and expire automatically.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+import json
+
+# Sentinel distinguishing "no such flow session" from a stored None
+_MISSING = object()
+
+class FlowSessionStore(ABC):
+    """Storage interface for flow sessions keyed by task ID."""
+
+    @abstractmethod
+    def create(self, task_id: str, session: Dict[str, Any]) -> None:
+        """
+        Store a new flow session.
+
+        Args:
+            task_id: Task ID of the flow session
+            session: Session data with flow_name, user_id, state and started_at
+        """
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a flow session.
+
+        Args:
+            task_id: Task ID of the flow session
+
+        Returns:
+            The session data, or None if the session does not exist
+        """
+
+    @abstractmethod
+    def update_state(self, task_id: str, state_update: Dict[str, Any]) -> bool:
+        """
+        Merge updates into a flow session's state.
+
+        Args:
+            task_id: Task ID of the flow session
+            state_update: State updates to apply
+
+        Returns:
+            True if the session existed and was updated, False otherwise
+        """
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """
+        Remove a flow session if it exists.
+
+        Args:
+            task_id: Task ID of the flow session
+        """
+
+class InMemoryFlowSessionStore(FlowSessionStore):
+    """Process-local flow session store."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, task_id: str, session: Dict[str, Any]) -> None:
+        self._sessions[task_id] = session
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(task_id)
+
+    def update_state(self, task_id: str, state_update: Dict[str, Any]) -> bool:
+        session = self._sessions.get(task_id, _MISSING)
+        if session is _MISSING:
+            return False
+        session["state"].update(state_update)
+        return True
+
+    def delete(self, task_id: str) -> None:
+        self._sessions.pop(task_id, _MISSING)
+
+class RedisFlowSessionStore(FlowSessionStore):
+    """
+    Redis-backed flow session store.
+
+    Each session is a hash at ``flow:{task_id}`` whose TTL is refreshed on
+    every write. Sessions returned by get() are snapshots; use update_state
+    to change them.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: int = 3600, key_prefix: str = "flow:"):
+        """
+        Initialize the store.
+
+        Args:
+            client: A redis-py compatible client (``redis.Redis(decode_responses=True)``)
+            ttl_seconds: Seconds an idle session is kept before expiring
+            key_prefix: Prefix for session keys
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.key_prefix}{task_id}"
+
+    def create(self, task_id: str, session: Dict[str, Any]) -> None:
+        key = self._key(task_id)
+        mapping = {
+            "flow_name": session["flow_name"],
+            "user_id": session["user_id"],
+            "started_at": session["started_at"],
+            "state": json.dumps(session.get("state", {}))
+        }
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.hgetall(self._key(task_id))
+        if not data:
+            return None
+        session = dict(data)
+        session["state"] = json.loads(session.get("state") or "{}")
+        return session
+
+    def update_state(self, task_id: str, state_update: Dict[str, Any]) -> bool:
+        key = self._key(task_id)
+        raw_state = self.client.hget(key, "state")
+        if raw_state is None:
+            return False
+        state = json.loads(raw_state)
+        state.update(state_update)
+        pipe = self.client.pipeline()
+        pipe.hset(key, "state", json.dumps(state))
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+        return True
+
+    def delete(self, task_id: str) -> None:
+        self.client.delete(self._key(task_id))
@@ -5,7 +5,10 @@ This module provides the core LLMAgent class that serves as the base for
 all agent implementations in the InstaBids system.
 """
 
-from typing import List, Dict, Any, Optional, Callable, Union, Tuple
+from typing import List, Dict, Any, Optional, Callable, Union, Tuple, AsyncIterator
+import asyncio
+import contextlib
+import inspect
 import json
 import logging
 import datetime
@@ -13,8 +16,22 @@ from uuid import uuid4
 
 from instabids.memory.persistent_memory import PersistentMemory
 
+from .flow_sessions import FlowSessionStore, InMemoryFlowSessionStore
+from .response_cache import LLMResponseCache
+
 logger = logging.getLogger(__name__)
 
+async def _call_memory(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Invoke a memory backend method without blocking the event loop.
+    
+    Coroutine functions are awaited directly; synchronous backends are
+    run in a worker thread so their I/O does not stall other chats.
+    """
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
 class LLMAgent:
     """Base class for all LLM-powered agents in the system."""
     
@@ -23,7 +40,10 @@ class LLMAgent:
         name: str, 
         tools: Optional[List[Dict[str, Any]]] = None,
         system_prompt: Optional[str] = None,
-        memory: Optional[PersistentMemory] = None
+        memory: Optional[PersistentMemory] = None,
+        cache: Optional[LLMResponseCache] = None,
+        flow_store: Optional[FlowSessionStore] = None,
+        tokenizer: Optional[Any] = None
     ):
         """
         Initialize a new LLM agent.
@@ -33,17 +53,83 @@ class LLMAgent:
             tools: List of tools available to the agent
             system_prompt: System prompt to use for the agent
             memory: Persistent memory instance for the agent
+            cache: Optional response cache consulted before calling the LLM
+            flow_store: Flow session storage; defaults to a process-local store
+            tokenizer: Optional tokenizer with an encode(str) -> List[int] method
         """
         self.name = name
-        self.tools = tools or []
-        self.system_prompt = system_prompt or ""
+        self.tools = tools or []  # also builds the name -> tool index
+        self.tokenizer = tokenizer
+        self.system_prompt = system_prompt or ""  # also pre-encodes the prompt
         self.memory = memory or PersistentMemory()
-        self._active_flow_sessions = {}
+        self.cache = cache
+        self.flow_store = flow_store or InMemoryFlowSessionStore()
+        # (interaction_type, data) pairs waiting for flush_interactions
+        self._interaction_buffer: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self._interaction_batch_size = 0
         
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        """Tools available to the agent. Reassign (rather than mutate) to re-index."""
+        return self._tools
+    
+    @tools.setter
+    def tools(self, tools: List[Dict[str, Any]]) -> None:
+        self._tools = tools
+        self._tools_by_name: Dict[str, Dict[str, Any]] = {}
+        for tool in tools:
+            # First tool registered under a name wins, as with the old linear scan
+            self._tools_by_name.setdefault(tool.get("name"), tool)
+    
+    @property
+    def system_prompt(self) -> str:
+        """System prompt for the agent."""
+        return self._system_prompt
+    
+    @system_prompt.setter
+    def system_prompt(self, system_prompt: str) -> None:
+        self._system_prompt = system_prompt
+        # The prompt is constant per agent, so tokenize it once here rather than per turn
+        self._system_prompt_ids: Optional[List[int]] = (
+            self.tokenizer.encode(system_prompt) if self.tokenizer is not None else None
+        )
+    
+    def encode_prompt(self, message: str) -> List[int]:
+        """
+        Token IDs for the system prompt followed by a user message.
+        
+        Args:
+            message: The user's message
+            
+        Returns:
+            Pre-encoded system prompt IDs with the message's IDs appended
+        """
+        if self.tokenizer is None:
+            raise ValueError(f"Agent {self.name} has no tokenizer")
+        if self._system_prompt_ids is None:
+            # Tokenizer was attached after the prompt was set
+            self._system_prompt_ids = self.tokenizer.encode(self._system_prompt)
+        return self._system_prompt_ids + self.tokenizer.encode(message)
+    
     def chat(self, message: str, user_id: Optional[str] = None) -> str:
         """
         Process a chat message from a user.
         
+        Synchronous wrapper around chat_async for callers outside an event loop.
+        
+        Args:
+            message: The user's message
+            user_id: Optional user ID to track the conversation
+            
+        Returns:
+            The agent's response
+        """
+        return asyncio.run(self.chat_async(message, user_id))
+    
+    async def chat_async(self, message: str, user_id: Optional[str] = None) -> str:
+        """
+        Process a chat message from a user without blocking the event loop.
+        
         Args:
             message: The user's message
             user_id: Optional user ID to track the conversation
@@ -57,17 +143,113 @@ class LLMAgent:
         logger.info(f"Agent {self.name} received message: {message}")
         
         # Use memory to get context
-        context = self.memory.get_context(user_id) if user_id else {}
+        context = await self._load_user_context(user_id) if user_id else {}
+        
+        # Serve repeated or paraphrased messages from the cache
+        scope = LLMResponseCache.scope_for(self.system_prompt, user_id) if self.cache else None
+        response = self.cache.get_similar(scope, message) if self.cache else None
         
-        # Process the message (in a real implementation, this would call the LLM)
-        response = f"Agent {self.name} processed: {message}"
+        if response is None:
+            # Process the message (in a real implementation, this would call the LLM)
+            response = f"Agent {self.name} processed: {message}"
+            if self.cache:
+                self.cache.put(scope, message, response)
         
         # Update memory
         if user_id:
-            self.memory.add_interaction(user_id, message, response)
+            await self._record_interaction("conversation", {
+                "user_id": user_id,
+                "message": message,
+                "response": response
+            })
             
         return response
     
+    async def _load_user_context(self, user_id: str) -> Dict[str, Any]:
+        """
+        Fetch conversation context and user preferences concurrently.
+        
+        Args:
+            user_id: User ID whose memory to read
+            
+        Returns:
+            The memory context, with preferences under "preferences" when the
+            memory backend provides them
+        """
+        lookups = [_call_memory(self.memory.get_context, user_id)]
+        get_preferences = getattr(self.memory, "get_all_preferences", None)
+        if get_preferences is not None:
+            lookups.append(_call_memory(get_preferences))
+        
+        results = await asyncio.gather(*lookups)
+        context = dict(results[0] or {})
+        if len(results) > 1:
+            context["preferences"] = results[1]
+        return context
+    
+    @contextlib.asynccontextmanager
+    async def buffered_interactions(
+        self,
+        batch_size: int = 50,
+        flush_interval: float = 1.0
+    ) -> AsyncIterator["LLMAgent"]:
+        """
+        Buffer memory interaction writes and flush them in batches.
+        
+        Interactions recorded inside the block are written when the buffer
+        reaches batch_size, every flush_interval seconds, and on exit.
+        
+        Args:
+            batch_size: Number of buffered interactions that triggers a flush
+            flush_interval: Seconds between background flushes
+        """
+        if self._interaction_buffer is not None:
+            # Already buffering; nested blocks share the outer buffer
+            yield self
+            return
+        
+        self._interaction_buffer = []
+        self._interaction_batch_size = batch_size
+        
+        async def _periodic_flush() -> None:
+            while True:
+                await asyncio.sleep(flush_interval)
+                await self.flush_interactions()
+        
+        flusher = asyncio.create_task(_periodic_flush())
+        try:
+            yield self
+        finally:
+            flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await flusher
+            await self.flush_interactions()
+            self._interaction_buffer = None
+    
+    async def flush_interactions(self) -> None:
+        """Write any buffered interactions to memory in a single batch."""
+        if not self._interaction_buffer:
+            return
+        
+        batch = self._interaction_buffer[:]
+        self._interaction_buffer.clear()
+        bulk = getattr(self.memory, "add_interactions_bulk", None)
+        if bulk is not None:
+            await _call_memory(bulk, batch)
+        else:
+            for interaction_type, data in batch:
+                await _call_memory(self.memory.add_interaction, interaction_type, data)
+    
+    async def _record_interaction(self, interaction_type: str, data: Dict[str, Any]) -> None:
+        """Record an interaction directly or into the active buffer."""
+        if self._interaction_buffer is None:
+            await _call_memory(self.memory.add_interaction, interaction_type, data)
+            return
+        
+        self._interaction_buffer.append((interaction_type, data))
+        if len(self._interaction_buffer) >= self._interaction_batch_size:
+            await self.flush_interactions()
+    
     def execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
         """
         Execute a tool by name with the given arguments.
@@ -80,8 +262,8 @@ class LLMAgent:
             The result of the tool execution
         """
         # Find the tool by name
-        tool = next((t for t in self.tools if t.get("name") == tool_name), None)
-        if not tool:
+        tool = self._tools_by_name.get(tool_name)
+        if tool is None:
             raise ValueError(f"Tool {tool_name} not found")
             
         # In a real implementation, this would execute the tool function
@@ -100,13 +282,13 @@ class LLMAgent:
         Returns:
             Task ID for the flow session
         """
-        task_id = str(uuid4())
-        self._active_flow_sessions[task_id] = {
+        task_id = uuid4().hex
+        self.flow_store.create(task_id, {
             "flow_name": flow_name,
             "user_id": user_id,
             "state": {},
             "started_at": datetime.datetime.now().isoformat()
-        }
+        })
         return task_id
     
     def end_flow(self, task_id: str) -> None:
@@ -116,8 +298,7 @@ class LLMAgent:
         Args:
             task_id: Task ID of the flow session to end
         """
-        if task_id in self._active_flow_sessions:
-            del self._active_flow_sessions[task_id]
+        self.flow_store.delete(task_id)
             
     def get_flow_state(self, task_id: str) -> Dict[str, Any]:
         """
@@ -129,10 +310,11 @@ class LLMAgent:
         Returns:
             The current state of the flow session
         """
-        if task_id not in self._active_flow_sessions:
+        session = self.flow_store.get(task_id)
+        if session is None:
             raise ValueError(f"Flow session {task_id} not found")
             
-        return self._active_flow_sessions[task_id]["state"]
+        return session["state"]
     
     def update_flow_state(self, task_id: str, state_update: Dict[str, Any]) -> None:
         """
@@ -142,7 +324,5 @@ class LLMAgent:
             task_id: Task ID of the flow session
             state_update: State updates to apply
         """
-        if task_id not in self._active_flow_sessions:
-            raise ValueError(f"Flow session {task_id} not found")
-            
-        self._active_flow_sessions[task_id]["state"].update(state_update)
\ No newline at end of file
+        if not self.flow_store.update_state(task_id, state_update):
+            raise ValueError(f"Flow session {task_id} not found")
\ No newline at end of file
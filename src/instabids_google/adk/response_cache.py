@@ -0,0 +1,137 @@
+"""
+Response cache for LLM agents.
+
+This module provides an in-process LRU/TTL cache that lets an agent answer
+repeated or paraphrased messages without another LLM round-trip.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import functools
+import hashlib
+import math
+import operator
+import time
+
+Embedding = Sequence[float]
+
+@functools.lru_cache(maxsize=64)
+def _prompt_hash(system_prompt: str) -> str:
+    """Digest of a system prompt; agents reuse a handful of prompts, so memoize."""
+    return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()
+
+def _norm(vector: Embedding) -> float:
+    return math.sqrt(math.fsum(x * x for x in vector))
+
+class LLMResponseCache:
+    """LRU cache of agent responses with TTL expiry and optional semantic lookup."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        embed: Optional[Callable[[str], Embedding]] = None,
+        similarity_threshold: float = 0.95
+    ):
+        """
+        Initialize a new response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses before LRU eviction
+            ttl_seconds: Seconds a cached response stays valid
+            embed: Optional function mapping a message to an embedding vector;
+                when given, paraphrases above similarity_threshold also hit
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        # (scope, normalized message) -> (expires_at, embedding, embedding norm, response)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Optional[Embedding], float, str]]" = OrderedDict()
+
+    @staticmethod
+    def scope_for(system_prompt: str, user_id: Optional[str] = None) -> str:
+        """
+        Build the cache scope for a system prompt and user.
+
+        Responses are generated with the user's memory context, so they are
+        only shared between messages from the same user under the same prompt.
+        """
+        return f"{_prompt_hash(system_prompt)}:{user_id or ''}"
+
+    @staticmethod
+    def _normalize(message: str) -> str:
+        return " ".join(message.lower().split())
+
+    def get_similar(self, scope: str, message: str) -> Optional[str]:
+        """
+        Look up a cached response for a message.
+
+        Args:
+            scope: Cache scope from scope_for
+            message: The user's message
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.monotonic()
+        key = (scope, self._normalize(message))
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, _, response = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return response
+            del self._entries[key]
+
+        if self.embed is None:
+            return None
+
+        # Semantic lookup: best match among live entries in the same scope
+        # Entry norms are computed once in put(), so each candidate costs one dot product
+        query = self.embed(message)
+        query_norm = _norm(query)
+        if not query_norm:
+            return None
+        best_key, best_score = None, self.similarity_threshold
+        expired: List[Tuple[str, str]] = []
+        for entry_key, (expires_at, embedding, norm, _) in self._entries.items():
+            if entry_key[0] != scope:
+                continue
+            if expires_at <= now:
+                expired.append(entry_key)
+                continue
+            if not norm:
+                continue
+            score = sum(map(operator.mul, query, embedding)) / (query_norm * norm)
+            if score >= best_score:
+                best_key, best_score = entry_key, score
+        for entry_key in expired:
+            del self._entries[entry_key]
+
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][3]
+
+    def put(self, scope: str, message: str, response: str) -> None:
+        """
+        Cache a response for a message.
+
+        Args:
+            scope: Cache scope from scope_for
+            message: The user's message
+            response: The agent's response
+        """
+        key = (scope, self._normalize(message))
+        embedding = self.embed(message) if self.embed is not None else None
+        norm = _norm(embedding) if embedding is not None else 0.0
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding, norm, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._entries.clear()
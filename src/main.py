@@ -7,9 +7,10 @@ from typing import Dict, Any, List, Optional
 
 from dotenv import load_dotenv
 from google.adk.runtime import agent_service
-from supabase import create_client, Client
+from supabase import AsyncClient
 
 from src.agents.homeowner_agent import HomeownerAgent
+from src.memory.memory_manager import _get_supabase
 
 # Set up logging
 logging.basicConfig(
@@ -22,8 +23,13 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-def create_supabase_client() -> Client:
-    """Create and return a Supabase client."""
+async def create_supabase_client() -> AsyncClient:
+    """Create and return the shared async Supabase client.
+    
+    The client (and its underlying HTTP session) is built once per process
+    by the memory manager's _get_supabase; later calls return the same
+    instance so callers never re-initialize it.
+    """
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_ROLE")
     
@@ -32,14 +38,14 @@ def create_supabase_client() -> Client:
             "SUPABASE_URL and SUPABASE_SERVICE_ROLE environment variables must be set"
         )
     
-    return create_client(url, key)
+    return await _get_supabase(url, key)
 
 
 async def main():
     """Main entry point for the application."""
     try:
         # Create Supabase client
-        db = create_supabase_client()
+        db = await create_supabase_client()
         logger.info("Supabase client created successfully")
         
         # Create agent
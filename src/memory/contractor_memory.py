@@ -2,16 +2,24 @@
 ContractorMemory implementation extending PersistentMemory with contractor-specific features.
 """
 
+import asyncio
+import heapq
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 import json
 import datetime
+import time
+from operator import itemgetter
 
 from .persistent_memory import PersistentMemory
-from supabase import Client
+from supabase import AsyncClient
 
 logger = logging.getLogger(__name__)
 
+# Project rows looked up by record_bid/record_bid_result are reused for a while
+_PROJECT_CACHE_TTL_SECONDS = 300
+_PROJECT_CACHE_MAX_ENTRIES = 256
+
 
 class ContractorMemory(PersistentMemory):
     """
@@ -19,11 +27,22 @@ class ContractorMemory(PersistentMemory):
     Adds bid pattern tracking and project recommendation intelligence.
     """
 
-    def __init__(self, db: Client, contractor_id: str):
+    def __init__(self, db: AsyncClient, contractor_id: str):
         """Initialize with database client and contractor ID."""
         super().__init__(db, contractor_id)
         self.contractor_id = contractor_id
         self._bid_metrics = None
+        # Bumped on every _bid_metrics mutation; derived views are memoized per version
+        self._metrics_version = 0
+        self._prefs_cache: Optional[Dict[str, Any]] = None
+        self._prefs_cache_version = -1
+        self._win_rate_cache: Dict[Tuple[str, str], float] = {}
+        self._win_rate_cache_version = -1
+        # Fields changed since the last save; save() sends only these
+        self._dirty_metrics: Set[str] = set()
+        self._dirty_bid_history: Set[str] = set()
+        # project_id -> (expires_at, project row)
+        self._project_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
     async def load(self) -> bool:
         """Load contractor's memory and bid metrics from database."""
@@ -32,17 +51,24 @@ class ContractorMemory(PersistentMemory):
             return False
 
         try:
-            # Load contractor-specific bid metrics
-            result = (
-                await self.db.table("contractor_bid_metrics")
+            # Load contractor-specific bid metrics and normalized win rates together
+            result, win_rates = await asyncio.gather(
+                self.db.table("contractor_bid_metrics")
                 .select("*")
                 .eq("contractor_id", self.contractor_id)
                 .maybe_single()
-                .execute()
+                .execute(),
+                self._load_win_rates(),
             )
 
             if result.data:
                 self._bid_metrics = result.data
+                # Generated column; the average is derived from the totals on read
+                self._bid_metrics.pop("avg_bid_amount", None)
+                if win_rates:
+                    # contractor_win_rates is the source of truth; the blob copy may lag
+                    self._bid_metrics["win_rates"] = win_rates
+                self._metrics_version += 1
                 logger.info(f"Loaded bid metrics for contractor {self.contractor_id}")
             else:
                 # Initialize new bid metrics
@@ -50,11 +76,12 @@ class ContractorMemory(PersistentMemory):
                     "contractor_id": self.contractor_id,
                     "total_bids": 0,
                     "successful_bids": 0,
-                    "avg_bid_amount": 0,
+                    "total_bid_amount": 0,
                     "bid_history": {},
                     "win_rates": {},
-                    "updated_at": datetime.datetime.utcnow().isoformat(),
+                    "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
                 }
+                self._metrics_version += 1
                 # Create initial record
                 await self.db.table("contractor_bid_metrics").insert(
                     self._bid_metrics
@@ -69,115 +96,129 @@ class ContractorMemory(PersistentMemory):
             logger.error(f"Error loading contractor bid metrics: {e}", exc_info=True)
             return False
 
+    async def _load_win_rates(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Load win-rate counters from contractor_win_rates as {dimension: {value: counts}}."""
+        result = (
+            await self.db.table("contractor_win_rates")
+            .select("dimension, value, bids, wins")
+            .eq("contractor_id", self.contractor_id)
+            .execute()
+        )
+
+        win_rates: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for row in result.data or []:
+            win_rates.setdefault(row["dimension"], {})[row["value"]] = {
+                "bids": row["bids"],
+                "wins": row["wins"],
+            }
+        return win_rates
+
     async def save(self) -> bool:
         """Save memory and bid metrics to database."""
         success = await super().save()
 
         if self._bid_metrics and self._is_loaded:
-            try:
-                # Update timestamp
-                self._bid_metrics["updated_at"] = datetime.datetime.utcnow().isoformat()
-
-                # Save bid metrics
-                result = (
-                    await self.db.table("contractor_bid_metrics")
-                    .upsert(self._bid_metrics)
-                    .execute()
-                )
-
-                if result.data:
-                    logger.info(
-                        f"Saved bid metrics for contractor {self.contractor_id}"
-                    )
-                    return success and True
-                else:
-                    logger.error(
-                        f"Failed to save bid metrics for contractor {self.contractor_id}"
-                    )
-                    return False
-
-            except Exception as e:
-                logger.error(f"Error saving contractor bid metrics: {e}", exc_info=True)
-                return False
+            return await self._save_bid_metrics() and success
 
         return success
 
+    async def _save_bid_metrics(self) -> bool:
+        """Send the changed bid metrics fields as a patch."""
+        if not self._dirty_metrics and not self._dirty_bid_history:
+            logger.debug(f"Bid metrics for contractor {self.contractor_id} unchanged, skipping save")
+            return True
+
+        # Take the dirty sets up front so fields changed during the await are kept
+        dirty_metrics, self._dirty_metrics = self._dirty_metrics, set()
+        dirty_bid_history, self._dirty_bid_history = self._dirty_bid_history, set()
+
+        try:
+            # Update timestamp
+            self._bid_metrics["updated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+            patch = {key: self._bid_metrics[key] for key in dirty_metrics}
+            if dirty_bid_history:
+                bid_history = self._bid_metrics["bid_history"]
+                patch["bid_history"] = {key: bid_history[key] for key in dirty_bid_history}
+
+            # Save bid metrics; the RPC merges the patch server-side
+            await self.db.rpc(
+                "patch_bid_metrics",
+                {"p_contractor_id": self.contractor_id, "p_patch": patch},
+            ).execute()
+
+            logger.info(
+                f"Saved bid metrics for contractor {self.contractor_id}"
+            )
+            return True
+
+        except Exception as e:
+            self._dirty_metrics |= dirty_metrics
+            self._dirty_bid_history |= dirty_bid_history
+            logger.error(f"Error saving contractor bid metrics: {e}", exc_info=True)
+            return False
+
     async def record_bid(self, project_id: str, bid_data: Dict[str, Any]) -> bool:
         """Record a new bid and update metrics."""
         if not self._is_loaded and not await self.load():
             return False
 
         try:
+            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
             # Add to interactions record
             bid_interaction = {
                 "project_id": project_id,
                 "bid_amount": bid_data.get("amount"),
-                "bid_date": datetime.datetime.utcnow().isoformat(),
+                "bid_date": now,
             }
 
-            await self.add_interaction("bid_submission", bid_interaction)
+            if not self._bid_metrics:
+                await self.add_interaction("bid_submission", bid_interaction)
+                return True
 
-            # Update bid metrics
-            if self._bid_metrics:
-                self._bid_metrics["total_bids"] += 1
-                self._bid_metrics["last_bid_date"] = (
-                    datetime.datetime.utcnow().isoformat()
-                )
+            # Write the interaction and look up the project while the running
+            # totals are updated
+            interaction_task = asyncio.create_task(
+                self.add_interaction("bid_submission", bid_interaction)
+            )
+            project_task = asyncio.create_task(self._fetch_project(project_id))
 
-                # Update average bid amount
-                total_amount = (
-                    self._bid_metrics["avg_bid_amount"]
-                    * (self._bid_metrics["total_bids"] - 1)
-                ) + bid_data.get("amount", 0)
-                self._bid_metrics["avg_bid_amount"] = (
-                    total_amount / self._bid_metrics["total_bids"]
-                )
+            # Update bid metrics
+            self._bid_metrics["total_bids"] += 1
+            self._bid_metrics["last_bid_date"] = now
+
+            # Keep the running total; the average is derived from it on read
+            self._bid_metrics["total_bid_amount"] = self._bid_metrics.get(
+                "total_bid_amount", 0
+            ) + bid_data.get("amount", 0)
+            self._metrics_version += 1
+            self._dirty_metrics.update(("total_bids", "last_bid_date", "total_bid_amount"))
+
+            # Update bid history by project type; gathering both tasks means
+            # neither is left unawaited if the project lookup fails
+            _, project = await asyncio.gather(interaction_task, project_task)
+
+            if project:
+                project_type = project.get("metadata", {}).get("project_type")
+                category = project.get("category")
+
+                amount = bid_data.get("amount", 0)
+                bid_history = self._bid_metrics.setdefault("bid_history", {})
+
+                # By project type, then by category
+                for key in (project_type, category):
+                    if key:
+                        entry = bid_history.setdefault(
+                            key, {"count": 0, "total_amount": 0}
+                        )
+                        entry["count"] += 1
+                        entry["total_amount"] += amount
+                        self._dirty_bid_history.add(key)
 
-                # Update bid history by project type
-                project_res = (
-                    await self.db.table("projects")
-                    .select("category, metadata")
-                    .eq("id", project_id)
-                    .maybe_single()
-                    .execute()
-                )
+                self._metrics_version += 1
 
-                if project_res.data:
-                    project_type = project_res.data.get("metadata", {}).get(
-                        "project_type"
-                    )
-                    category = project_res.data.get("category")
-
-                    if not "bid_history" in self._bid_metrics:
-                        self._bid_metrics["bid_history"] = {}
-
-                    # By project type
-                    if project_type:
-                        if project_type not in self._bid_metrics["bid_history"]:
-                            self._bid_metrics["bid_history"][project_type] = {
-                                "count": 0,
-                                "total_amount": 0,
-                            }
-
-                        self._bid_metrics["bid_history"][project_type]["count"] += 1
-                        self._bid_metrics["bid_history"][project_type][
-                            "total_amount"
-                        ] += bid_data.get("amount", 0)
-
-                    # By category
-                    if category:
-                        if category not in self._bid_metrics["bid_history"]:
-                            self._bid_metrics["bid_history"][category] = {
-                                "count": 0,
-                                "total_amount": 0,
-                            }
-
-                        self._bid_metrics["bid_history"][category]["count"] += 1
-                        self._bid_metrics["bid_history"][category][
-                            "total_amount"
-                        ] += bid_data.get("amount", 0)
-
-                await self.save()
+            await self._save_bid_metrics()
 
             return True
 
@@ -202,55 +243,56 @@ class ContractorMemory(PersistentMemory):
                 "project_id": project_id,
                 "bid_id": bid_id,
                 "status": status,
-                "result_date": datetime.datetime.utcnow().isoformat(),
+                "result_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             }
 
-            await self.add_interaction("bid_result", result_interaction)
+            if not self._bid_metrics:
+                await self.add_interaction("bid_result", result_interaction)
+                return True
 
-            # Update success metrics
-            if self._bid_metrics:
-                if status == "accepted":
-                    self._bid_metrics["successful_bids"] += 1
-
-                # Get project details for win rate updates
-                project_res = (
-                    await self.db.table("projects")
-                    .select("category, location_description, metadata")
-                    .eq("id", project_id)
-                    .maybe_single()
-                    .execute()
-                )
-
-                if project_res.data:
-                    project_type = project_res.data.get("metadata", {}).get(
-                        "project_type"
-                    )
-                    category = project_res.data.get("category")
-                    location = project_res.data.get("location_description")
-
-                    # Initialize win_rates structure if needed
-                    if "win_rates" not in self._bid_metrics:
-                        self._bid_metrics["win_rates"] = {}
-
-                    # Update by project type
-                    if project_type:
-                        self._update_win_rate(
-                            "project_type", project_type, status == "accepted"
-                        )
-
-                    # Update by category
-                    if category:
-                        self._update_win_rate(
-                            "category", category, status == "accepted"
-                        )
-
-                    # Update by location
-                    if location:
-                        self._update_win_rate(
-                            "location", location, status == "accepted"
-                        )
+            # Write the interaction and get project details for win rate updates
+            # while the success metrics are updated
+            interaction_task = asyncio.create_task(
+                self.add_interaction("bid_result", result_interaction)
+            )
+            project_task = asyncio.create_task(self._fetch_project(project_id))
 
-                await self.save()
+            # Update success metrics
+            won = status == "accepted"
+            if won:
+                self._bid_metrics["successful_bids"] += 1
+                self._metrics_version += 1
+
+            # Gathering both tasks means neither is left unawaited if the
+            # project lookup fails
+            _, project = await asyncio.gather(interaction_task, project_task)
+
+            win_rate_rows = []
+            if project:
+                project_type = project.get("metadata", {}).get("project_type")
+                category = project.get("category")
+                location = project.get("location_description")
+
+                # Update by project type, category and location
+                for dimension, value in (
+                    ("project_type", project_type),
+                    ("category", category),
+                    ("location", location),
+                ):
+                    if value:
+                        self._update_win_rate(dimension, value, won)
+                        win_rate_rows.append({"dim": dimension, "val": value, "won": won})
+
+            # Persist only the changed counters: one RPC increments the win-rate
+            # rows and successful_bids instead of re-upserting the whole blob
+            await self.db.rpc(
+                "increment_win_rates_batch",
+                {
+                    "p_contractor_id": self.contractor_id,
+                    "p_won": won,
+                    "rows": win_rate_rows,
+                },
+            ).execute()
 
             return True
 
@@ -258,20 +300,37 @@ class ContractorMemory(PersistentMemory):
             logger.error(f"Error recording bid result: {e}", exc_info=True)
             return False
 
+    async def _fetch_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch the project fields used for bid metrics, reusing recent lookups."""
+        now = time.monotonic()
+        cached = self._project_cache.get(project_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        result = (
+            await self.db.table("projects")
+            .select("category, location_description, metadata")
+            .eq("id", project_id)
+            .maybe_single()
+            .execute()
+        )
+        if not result.data:
+            return None
+
+        self._project_cache.pop(project_id, None)
+        if len(self._project_cache) >= _PROJECT_CACHE_MAX_ENTRIES:
+            # Evict the oldest lookup
+            del self._project_cache[next(iter(self._project_cache))]
+        self._project_cache[project_id] = (now + _PROJECT_CACHE_TTL_SECONDS, result.data)
+        return result.data
+
     def _update_win_rate(self, dimension: str, value: str, won: bool):
         """Update win rate statistics for a specific dimension (project_type, category, location)."""
-        if "win_rates" not in self._bid_metrics:
-            self._bid_metrics["win_rates"] = {}
-
-        if dimension not in self._bid_metrics["win_rates"]:
-            self._bid_metrics["win_rates"][dimension] = {}
-
-        if value not in self._bid_metrics["win_rates"][dimension]:
-            self._bid_metrics["win_rates"][dimension][value] = {"bids": 0, "wins": 0}
-
-        self._bid_metrics["win_rates"][dimension][value]["bids"] += 1
-        if won:
-            self._bid_metrics["win_rates"][dimension][value]["wins"] += 1
+        rates = self._bid_metrics.setdefault("win_rates", {}).setdefault(dimension, {})
+        record = rates.setdefault(value, {"bids": 0, "wins": 0})
+        record["bids"] += 1
+        record["wins"] += int(won)
+        self._metrics_version += 1
 
     async def record_recommendation_reaction(
         self, project_id: str, reaction: str, score: Optional[int] = None
@@ -291,7 +350,7 @@ class ContractorMemory(PersistentMemory):
                 .execute()
             )
 
-            now = datetime.datetime.utcnow().isoformat()
+            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
             if result.data:
                 # Update existing record
@@ -339,11 +398,23 @@ class ContractorMemory(PersistentMemory):
 
     def get_bid_preferences(self) -> Dict[str, Any]:
         """Get bidding preferences inferred from bid history and win rates."""
+        if self._prefs_cache_version != self._metrics_version:
+            self._prefs_cache = self._compute_bid_preferences()
+            self._prefs_cache_version = self._metrics_version
+        return dict(self._prefs_cache)
+
+    def _compute_bid_preferences(self) -> Dict[str, Any]:
+        """Aggregate bid preferences from the current _bid_metrics."""
         preferences = {}
 
         if not self._is_loaded or not self._bid_metrics:
             return preferences
 
+        total_bids = self._bid_metrics.get("total_bids", 0)
+        preferences["avg_bid_amount"] = (
+            self._bid_metrics.get("total_bid_amount", 0) / total_bids if total_bids else 0
+        )
+
         # Extract preferred project types based on highest win rates
         if (
             "win_rates" in self._bid_metrics
@@ -351,20 +422,15 @@ class ContractorMemory(PersistentMemory):
         ):
             project_types = self._bid_metrics["win_rates"]["project_type"]
 
-            # Filter to types with at least 3 bids
-            valid_types = {
-                k: v for k, v in project_types.items() if v.get("bids", 0) >= 3
-            }
-
-            # Calculate win rates
-            type_win_rates = {
-                k: v.get("wins", 0) / v.get("bids", 1) for k, v in valid_types.items()
-            }
+            # Win rates for types with at least 3 bids, computed in one pass
+            type_win_rates = (
+                (k, v.get("wins", 0) / v["bids"])
+                for k, v in project_types.items()
+                if v.get("bids", 0) >= 3
+            )
 
             # Get top 3 by win rate
-            preferred_types = sorted(
-                type_win_rates.items(), key=lambda x: x[1], reverse=True
-            )[:3]
+            preferred_types = heapq.nlargest(3, type_win_rates, key=itemgetter(1))
             preferences["preferred_project_types"] = [
                 t[0] for t in preferred_types if t[1] > 0.3
             ]  # Only include if win rate > 30%
@@ -376,33 +442,23 @@ class ContractorMemory(PersistentMemory):
         ):
             locations = self._bid_metrics["win_rates"]["location"]
 
-            # Filter to locations with at least 2 bids
-            valid_locations = {
-                k: v for k, v in locations.items() if v.get("bids", 0) >= 2
-            }
-
-            # Get locations with good win rates
-            good_locations = [
+            # Locations with at least 2 bids and a win rate > 40%
+            preferences["preferred_locations"] = [
                 k
-                for k, v in valid_locations.items()
-                if v.get("wins", 0) / v.get("bids", 1) > 0.4
-            ]  # Win rate > 40%
-
-            preferences["preferred_locations"] = good_locations
+                for k, v in locations.items()
+                if v.get("bids", 0) >= 2 and v.get("wins", 0) / v["bids"] > 0.4
+            ]
 
         # Extract typical bid amounts by category
         if "bid_history" in self._bid_metrics:
             bid_history = self._bid_metrics["bid_history"]
 
-            bid_amounts = {}
-            for category, data in bid_history.items():
-                if (
-                    data.get("count", 0) >= 3
-                ):  # Need at least 3 bids to establish pattern
-                    avg_amount = data.get("total_amount", 0) / data.get("count", 1)
-                    bid_amounts[category] = avg_amount
-
-            preferences["typical_bid_amounts"] = bid_amounts
+            # Need at least 3 bids to establish pattern
+            preferences["typical_bid_amounts"] = {
+                category: data.get("total_amount", 0) / data["count"]
+                for category, data in bid_history.items()
+                if data.get("count", 0) >= 3
+            }
 
         return preferences
 
@@ -412,6 +468,18 @@ class ContractorMemory(PersistentMemory):
         if not self._is_loaded and not await self.load():
             return 0.0
 
+        if self._win_rate_cache_version != self._metrics_version:
+            self._win_rate_cache.clear()
+            self._win_rate_cache_version = self._metrics_version
+
+        key = (dimension, value)
+        rate = self._win_rate_cache.get(key)
+        if rate is None:
+            rate = self._win_rate_cache[key] = self._compute_win_rate(dimension, value)
+        return rate
+
+    def _compute_win_rate(self, dimension: str, value: str) -> float:
+        """Win rate for a dimension value from the current _bid_metrics."""
         if "win_rates" not in self._bid_metrics:
             return 0.0
 
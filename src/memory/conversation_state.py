@@ -7,7 +7,7 @@ This module handles conversation state tracking, including multi-modal inputs an
 
 import logging
 import uuid
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -26,11 +26,33 @@ class ConversationState:
             conversation_id: Unique identifier for the conversation
         """
         self.conversation_id = conversation_id
-        self.history = []
+        # History is stored column-wise; message dicts are only built on access
+        self._roles: List[str] = []
+        self._contents: List[str] = []
+        self._timestamps: List[Optional[str]] = []
         self.slots = {}
-        self.required_slots = set()
-        self.optional_slots = set()
+        self.required_slots: FrozenSet[str] = frozenset()
+        self.optional_slots: FrozenSet[str] = frozenset()
+        # Union of required and optional slots, so set_slot is one membership test
+        self._known_slots: FrozenSet[str] = frozenset()
         self.multi_modal_context = {}
+        # Read-only snapshot of history, rebuilt only after the history changes
+        self._history_view: Optional[Tuple[Dict[str, Any], ...]] = None
+    
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Conversation history as a list of message dicts.
+        
+        The list is built on each access; use add_message to extend the history.
+        """
+        return list(self.get_history())
+    
+    @history.setter
+    def history(self, messages: List[Dict[str, Any]]) -> None:
+        self._roles = [message.get("role") for message in messages]
+        self._contents = [message.get("content") for message in messages]
+        self._timestamps = [message.get("timestamp") for message in messages]
+        self._history_view = None
     
     def add_message(self, role: str, content: str) -> None:
         """Add a message to the conversation history.
@@ -39,11 +61,10 @@ class ConversationState:
             role: Role of the sender (e.g., "user", "assistant")
             content: Message content
         """
-        self.history.append({
-            "role": role,
-            "content": content,
-            "timestamp": None  # Will be filled when persisted
-        })
+        self._roles.append(role)
+        self._contents.append(content)
+        self._timestamps.append(None)  # Will be filled when persisted
+        self._history_view = None
     
     def add_multi_modal_input(self, input_id: str, input_type: str, data: Dict[str, Any]) -> None:
         """Add a multi-modal input to the conversation context.
@@ -64,7 +85,8 @@ class ConversationState:
         Args:
             slots: List of required slot names
         """
-        self.required_slots = set(slots)
+        self.required_slots = frozenset(slots)
+        self._known_slots = self.required_slots | self.optional_slots
     
     def set_optional_slots(self, slots: List[str]) -> None:
         """Set the optional slots for this conversation.
@@ -72,7 +94,13 @@ class ConversationState:
         Args:
             slots: List of optional slot names
         """
-        self.optional_slots = set(slots)
+        self.optional_slots = frozenset(slots)
+        self._known_slots = self.required_slots | self.optional_slots
+    
+    @property
+    def known_slots(self) -> FrozenSet[str]:
+        """Names of all required and optional slots."""
+        return self._known_slots
     
     def set_slot(self, slot_name: str, value: Any) -> bool:
         """Set a slot value.
@@ -84,7 +112,7 @@ class ConversationState:
         Returns:
             bool: True if this is a valid slot, False otherwise
         """
-        if slot_name in self.required_slots or slot_name in self.optional_slots:
+        if slot_name in self._known_slots:
             self.slots[slot_name] = value
             return True
         else:
@@ -111,13 +139,13 @@ class ConversationState:
         """
         return self.slots.copy()
     
-    def get_missing_required_slots(self) -> Set[str]:
+    def get_missing_required_slots(self) -> FrozenSet[str]:
         """Get the set of required slots that haven't been filled.
         
         Returns:
             Set of missing required slot names
         """
-        return self.required_slots - set(self.slots.keys())
+        return self.required_slots.difference(self.slots)
     
     def all_required_slots_filled(self) -> bool:
         """Check if all required slots are filled.
@@ -127,13 +155,35 @@ class ConversationState:
         """
         return len(self.get_missing_required_slots()) == 0
     
-    def get_history(self) -> List[Dict[str, Any]]:
+    def get_history(self) -> Tuple[Dict[str, Any], ...]:
         """Get the conversation history.
         
+        Returns:
+            Read-only sequence of messages in the conversation
+        """
+        if self._history_view is None:
+            self._history_view = tuple(
+                {"role": role, "content": content, "timestamp": timestamp}
+                for role, content, timestamp in zip(self._roles, self._contents, self._timestamps)
+            )
+        return self._history_view
+    
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the conversation history without building a snapshot.
+        
+        Yields:
+            Messages in the conversation, oldest first
+        """
+        for role, content, timestamp in zip(self._roles, self._contents, self._timestamps):
+            yield {"role": role, "content": content, "timestamp": timestamp}
+    
+    def get_history_mutable(self) -> List[Dict[str, Any]]:
+        """Get a copy of the conversation history that the caller may modify.
+        
         Returns:
             List of messages in the conversation
         """
-        return self.history.copy()
+        return list(self.get_history())
     
     def get_multi_modal_context(self) -> Dict[str, Dict[str, Any]]:
         """Get the multi-modal context data.
@@ -171,7 +221,7 @@ class ConversationState:
         state = cls(data.get("conversation_id", str(uuid.uuid4())))
         state.history = data.get("history", [])
         state.slots = data.get("slots", {})
-        state.required_slots = set(data.get("required_slots", []))
-        state.optional_slots = set(data.get("optional_slots", []))
+        state.set_required_slots(data.get("required_slots", []))
+        state.set_optional_slots(data.get("optional_slots", []))
         state.multi_modal_context = data.get("multi_modal_context", {})
         return state
\ No newline at end of file
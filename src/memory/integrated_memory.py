@@ -10,19 +10,45 @@ This module combines the functionality of:
 Part of sprint/memory-a2a-integration.
 """
 
+import asyncio
 import json
 import logging
+import sys
 import uuid
 import datetime
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 
 from google.adk.memory import Memory
-from supabase import Client
+from supabase import AsyncClient
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
+# Characters of agent message content kept in interaction summaries
+_SUMMARY_LENGTH = 100
+
+# Queued interaction rows that trigger an immediate bulk write
+_INTERACTION_BATCH_SIZE = 32
+
+# Queue attribute, table and conflict target of each batch _write_pending sends
+_PENDING_TABLES = (
+    ("_pending_messages", "agent_messages", "id"),
+    ("_pending_interactions", "user_memory_interactions", "id"),
+    ("_pending_routing", "message_routing_logs", "id"),
+    ("_pending_history", "conversation_messages", "conversation_id,seq"),
+)
+
+# Preference confidence by observation count: 0.5 + 0.1 per observation,
+# capped at 0.95 (reached at count 5, so later counts use the last entry)
+_CONFIDENCE = tuple(min(0.5 + (count * 0.1), 0.95) for count in range(16))
+
+
+def _utcnow_iso() -> str:
+    """Current UTC time as an ISO 8601 string with an explicit offset."""
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
 class IntegratedMemory(Memory):
     """Integrated persistent memory with conversation state tracking and A2A support.
     
@@ -33,28 +59,65 @@ class IntegratedMemory(Memory):
     - Agent-to-agent message routing information
     """
     
-    def __init__(self, db: Client, user_id: str):
+    def __init__(self, db: AsyncClient, user_id: str, save_delay: float = 0.5):
         """Initialize integrated memory for a user.
         
         Args:
             db: Supabase client instance
             user_id: User ID to associate with this memory instance
+            save_delay: Seconds of inactivity after a mutation before memory is
+                saved in the background
         """
         super().__init__()  # Initialize base Memory class
         self.db = db
         self.user_id = user_id
         self._memory_cache = {}  # In-memory cache
+        # preference_key -> value, kept in step with learned_preferences
+        self._pref_values: Dict[str, Any] = {}
         self._is_loaded = False
         self._is_dirty = False
+        # Whether the user_memories row exists; rows in other tables reference it
+        self._is_persisted = False
         
         # Conversation state tracking
         self.conversation_id = str(uuid.uuid4())  # Default conversation ID
-        self.history = []
+        # History is stored column-wise; message dicts are only built on access
+        self._roles: List[str] = []
+        self._contents: List[str] = []
+        self._timestamps: List[Optional[str]] = []
         self.slots = {}
-        self.required_slots = set()
-        self.optional_slots = set()
+        self.required_slots: FrozenSet[str] = frozenset()
+        self.optional_slots: FrozenSet[str] = frozenset()
         self.multi_modal_context = {}
         self.session_ids = set()  # Track active conversation sessions
+        # Read-only snapshot of history, rebuilt only after the history changes
+        self._history_view: Optional[Tuple[Dict[str, Any], ...]] = None
+        
+        # Rows waiting to be written by the next flush
+        self._pending_messages: List[Dict[str, Any]] = []
+        self._pending_interactions: List[Dict[str, Any]] = []
+        self._pending_routing: List[Dict[str, Any]] = []
+        self._pending_history: List[Dict[str, Any]] = []
+        self._pending_flush: Optional["asyncio.Future[bool]"] = None
+        
+        # Debounced background save; a burst of mutations results in one upsert
+        self._save_delay = save_delay
+        self._save_task: Optional["asyncio.Task[bool]"] = None
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Conversation history as a list of message dicts.
+        
+        The list is built on each access; use add_message to extend the history.
+        """
+        return list(self.get_history())
+
+    @history.setter
+    def history(self, messages: List[Dict[str, Any]]) -> None:
+        self._roles = [sys.intern(message.get("role")) for message in messages]
+        self._contents = [message.get("content") for message in messages]
+        self._timestamps = [message.get("timestamp") for message in messages]
+        self._history_view = None
 
     async def load(self) -> bool:
         """Load memory from database.
@@ -78,32 +141,55 @@ class IntegratedMemory(Memory):
             if result.data:
                 # Load memory from database
                 memory_data = result.data.get("memory_data", {})
+                # Interactions live in user_memory_interactions; older blobs also
+                # carried a copy, which the next save drops
+                memory_data.pop("interactions", None)
                 self._memory_cache = memory_data
+                self._pref_values = {
+                    key: pref["value"]
+                    for key, pref in memory_data.get("learned_preferences", {}).items()
+                }
                 
                 # Extract conversation state if available
+                legacy_history = None
                 if "conversation_state" in memory_data:
                     conv_state = memory_data["conversation_state"]
                     self.conversation_id = conv_state.get("conversation_id", self.conversation_id)
-                    self.history = conv_state.get("history", [])
+                    legacy_history = conv_state.get("history")
                     self.slots = conv_state.get("slots", {})
-                    self.required_slots = set(conv_state.get("required_slots", []))
-                    self.optional_slots = set(conv_state.get("optional_slots", []))
+                    self.required_slots = frozenset(conv_state.get("required_slots", []))
+                    self.optional_slots = frozenset(conv_state.get("optional_slots", []))
                     self.multi_modal_context = conv_state.get("multi_modal_context", {})
                     self.session_ids = set(conv_state.get("session_ids", []))
                 
+                # History lives in conversation_messages, one row per message
+                await self._load_history()
+                self._is_dirty = False
+                if not self._roles and legacy_history:
+                    # Memory saved before history moved out of memory_data;
+                    # queue it so the next save writes the rows and drops the array
+                    self.history = legacy_history
+                    self._pending_history = [
+                        self._history_row(seq, role, content, timestamp)
+                        for seq, (role, content, timestamp) in enumerate(
+                            zip(self._roles, self._contents, self._timestamps)
+                        )
+                    ]
+                    self._is_dirty = True
+                
                 logger.info(f"Successfully loaded memory for user {self.user_id}")
                 self._is_loaded = True
-                self._is_dirty = False
+                self._is_persisted = True
+                if self._is_dirty:
+                    self._schedule_save()
                 return True
             else:
                 # Initialize new memory
                 logger.info(f"No existing memory found for user {self.user_id}. Initializing.")
                 self._memory_cache = {
-                    "interactions": [],
                     "context": {},
                     "conversation_state": {
                         "conversation_id": self.conversation_id,
-                        "history": [],
                         "slots": {},
                         "required_slots": [],
                         "optional_slots": [],
@@ -111,17 +197,99 @@ class IntegratedMemory(Memory):
                         "session_ids": []
                     },
                     "learned_preferences": {},
-                    "creation_date": datetime.datetime.utcnow().isoformat(),
+                    "creation_date": _utcnow_iso(),
                 }
+                # The row is upserted lazily by the first save after a mutation,
+                # so users who never interact cost no write
                 self._is_loaded = True
-                self._is_dirty = True
-                await self.save()  # Create initial memory record
                 return True
 
         except Exception as e:
             logger.error(f"Error loading memory for user {self.user_id}: {e}", exc_info=True)
             return False
 
+    async def _load_history(self, page_size: int = 1000) -> None:
+        """Load the conversation's messages in order, a page at a time.
+        
+        Args:
+            page_size: Number of messages fetched per request
+        """
+        roles: List[str] = []
+        contents: List[str] = []
+        timestamps: List[Optional[str]] = []
+        while True:
+            result = (
+                await self.db.table("conversation_messages")
+                .select("role, content, created_at")
+                .eq("conversation_id", self.conversation_id)
+                .order("seq")
+                .range(len(roles), len(roles) + page_size - 1)
+                .execute()
+            )
+            rows = result.data or []
+            for row in rows:
+                roles.append(sys.intern(row["role"]))
+                contents.append(row["content"])
+                timestamps.append(row["created_at"])
+            if len(rows) < page_size:
+                break
+        self._roles, self._contents, self._timestamps = roles, contents, timestamps
+        self._history_view = None
+
+    def _history_row(
+        self, seq: int, role: str, content: str, timestamp: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the conversation_messages row for a history message."""
+        return {
+            "conversation_id": self.conversation_id,
+            "seq": seq,
+            "user_id": self.user_id,
+            "role": role,
+            "content": content,
+            "created_at": timestamp,
+        }
+
+    async def load_full(self, recent_limit: int = 50) -> Optional[Dict[str, Any]]:
+        """Load memory together with stored preferences and recent interactions.
+        
+        The three reads are independent, so they are issued concurrently.
+        
+        Args:
+            recent_limit: Maximum number of recent interactions to return
+            
+        Returns:
+            Dictionary with "preferences" (key -> value) and "recent_interactions"
+            (newest first), or None if memory could not be loaded
+        """
+        try:
+            loaded, prefs_result, recent_result = await asyncio.gather(
+                self.load(),
+                self.db.table("user_preferences")
+                .select("*")
+                .eq("user_id", self.user_id)
+                .execute(),
+                self.db.table("user_memory_interactions")
+                .select("*")
+                .eq("user_id", self.user_id)
+                .order("created_at", desc=True)
+                .limit(recent_limit)
+                .execute(),
+            )
+        except Exception as e:
+            logger.error(f"Error loading full memory for user {self.user_id}: {e}", exc_info=True)
+            return None
+
+        if not loaded:
+            return None
+
+        return {
+            "preferences": {
+                row["preference_key"]: row["preference_value"]
+                for row in prefs_result.data or []
+            },
+            "recent_interactions": recent_result.data or [],
+        }
+
     async def save(self) -> bool:
         """Save memory to database if it has changed.
         
@@ -140,9 +308,9 @@ class IntegratedMemory(Memory):
             logger.info(f"Saving memory for user {self.user_id}")
             
             # Update conversation state in memory cache before saving
+            # History is appended to conversation_messages, not stored here
             self._memory_cache["conversation_state"] = {
                 "conversation_id": self.conversation_id,
-                "history": self.history,
                 "slots": self.slots,
                 "required_slots": list(self.required_slots),
                 "optional_slots": list(self.optional_slots),
@@ -151,33 +319,88 @@ class IntegratedMemory(Memory):
             }
             
             # Update timestamp before saving
-            self._memory_cache["last_updated"] = datetime.datetime.utcnow().isoformat()
+            now = _utcnow_iso()
+            self._memory_cache["last_updated"] = now
             
-            # Update memory in database
-            result = (
-                await self.db.table("user_memories")
+            # Clear the flag before the write so changes made while it is in
+            # flight mark memory dirty again instead of being lost
+            self._is_dirty = False
+            
+            upsert = (
+                self.db.table("user_memories")
                 .upsert(
                     {
                         "user_id": self.user_id,
                         "memory_data": self._memory_cache,
-                        "updated_at": datetime.datetime.utcnow().isoformat(),
+                        "updated_at": now,
                     }
                 )
                 .execute()
             )
+            if self._is_persisted:
+                # Update memory in database; new history rows go out alongside it
+                result, rows_written = await asyncio.gather(upsert, self._flush_pending())
+            else:
+                # First save creates the row that queued rows reference
+                result = await upsert
+                self._is_persisted = bool(result.data)
+                rows_written = await self._flush_pending()
 
-            if result.data:
-                self._is_dirty = False
+            if result.data and rows_written:
                 logger.info(f"Successfully saved memory for user {self.user_id}")
                 return True
             else:
+                self._is_dirty = True
                 logger.error(f"Failed to save memory for user {self.user_id}")
                 return False
 
         except Exception as e:
+            self._is_dirty = True
             logger.error(f"Error saving memory for user {self.user_id}: {e}", exc_info=True)
             return False
 
+    def _mark_dirty(self) -> None:
+        """Flag memory as changed and schedule a debounced save."""
+        self._is_dirty = True
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        """(Re)start the debounced save timer.
+        
+        Outside a running event loop nothing is scheduled and callers save
+        explicitly, as before.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if self._save_task is not None:
+            # Only a task still waiting out its delay is pending here
+            self._save_task.cancel()
+        self._save_task = loop.create_task(self._debounced_save())
+
+    async def _debounced_save(self) -> bool:
+        """Save once no further mutations arrive within the save delay."""
+        await asyncio.sleep(self._save_delay)
+        # Detach before saving so later mutations schedule a new save rather
+        # than cancelling this one mid-write
+        self._save_task = None
+        return await self.save()
+
+    async def close(self) -> bool:
+        """Write any queued rows and pending changes before shutdown.
+        
+        Returns:
+            bool: True if everything was written successfully, False otherwise
+        """
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        if not self._is_loaded:
+            return await self._flush_pending()
+        return await self.flush()
+
     #
     # Conversation State Management
     #
@@ -189,13 +412,17 @@ class IntegratedMemory(Memory):
             role: Role of the sender (e.g., "user", "assistant")
             content: Message content
         """
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        }
-        self.history.append(message)
-        self._is_dirty = True
+        # Roles repeat on every message; share one string object per role
+        role = sys.intern(role)
+        timestamp = _utcnow_iso()
+        self._roles.append(role)
+        self._contents.append(content)
+        self._timestamps.append(timestamp)
+        self._history_view = None
+        self._pending_history.append(
+            self._history_row(len(self._roles) - 1, role, content, timestamp)
+        )
+        self._mark_dirty()
     
     def add_multi_modal_input(self, input_id: str, input_type: str, data: Dict[str, Any]) -> None:
         """Add a multi-modal input to the conversation context.
@@ -208,9 +435,9 @@ class IntegratedMemory(Memory):
         self.multi_modal_context[input_id] = {
             "type": input_type,
             "data": data,
-            "timestamp": datetime.datetime.utcnow().isoformat()
+            "timestamp": _utcnow_iso()
         }
-        self._is_dirty = True
+        self._mark_dirty()
     
     def set_required_slots(self, slots: List[str]) -> None:
         """Set the required slots for this conversation.
@@ -218,8 +445,8 @@ class IntegratedMemory(Memory):
         Args:
             slots: List of required slot names
         """
-        self.required_slots = set(slots)
-        self._is_dirty = True
+        self.required_slots = frozenset(slots)
+        self._mark_dirty()
     
     def set_optional_slots(self, slots: List[str]) -> None:
         """Set the optional slots for this conversation.
@@ -227,8 +454,8 @@ class IntegratedMemory(Memory):
         Args:
             slots: List of optional slot names
         """
-        self.optional_slots = set(slots)
-        self._is_dirty = True
+        self.optional_slots = frozenset(slots)
+        self._mark_dirty()
     
     def set_slot(self, slot_name: str, value: Any) -> bool:
         """Set a slot value.
@@ -242,7 +469,7 @@ class IntegratedMemory(Memory):
         """
         if slot_name in self.required_slots or slot_name in self.optional_slots:
             self.slots[slot_name] = value
-            self._is_dirty = True
+            self._mark_dirty()
             return True
         else:
             logger.warning(f"Attempted to set unknown slot '{slot_name}'")
@@ -268,13 +495,13 @@ class IntegratedMemory(Memory):
         """
         return self.slots.copy()
     
-    def get_missing_required_slots(self) -> Set[str]:
+    def get_missing_required_slots(self) -> FrozenSet[str]:
         """Get the set of required slots that haven't been filled.
         
         Returns:
             Set of missing required slot names
         """
-        return self.required_slots - set(self.slots.keys())
+        return self.required_slots.difference(self.slots)
     
     def all_required_slots_filled(self) -> bool:
         """Check if all required slots are filled.
@@ -282,15 +509,38 @@ class IntegratedMemory(Memory):
         Returns:
             bool: True if all required slots are filled, False otherwise
         """
-        return len(self.get_missing_required_slots()) == 0
+        # Stops at the first missing slot and builds no intermediate set
+        return all(slot in self.slots for slot in self.required_slots)
     
-    def get_history(self) -> List[Dict[str, Any]]:
+    def get_history(self) -> Tuple[Dict[str, Any], ...]:
         """Get the conversation history.
         
+        Returns:
+            Read-only sequence of messages in the conversation
+        """
+        if self._history_view is None:
+            self._history_view = tuple(
+                {"role": role, "content": content, "timestamp": timestamp}
+                for role, content, timestamp in zip(self._roles, self._contents, self._timestamps)
+            )
+        return self._history_view
+    
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the conversation history without building a snapshot.
+        
+        Yields:
+            Messages in the conversation, oldest first
+        """
+        for role, content, timestamp in zip(self._roles, self._contents, self._timestamps):
+            yield {"role": role, "content": content, "timestamp": timestamp}
+    
+    def get_history_mutable(self) -> List[Dict[str, Any]]:
+        """Get a copy of the conversation history that the caller may modify.
+        
         Returns:
             List of messages in the conversation
         """
-        return self.history.copy()
+        return list(self.get_history())
     
     def get_multi_modal_context(self) -> Dict[str, Dict[str, Any]]:
         """Get the multi-modal context data.
@@ -307,7 +557,7 @@ class IntegratedMemory(Memory):
             session_id: Session ID to associate
         """
         self.session_ids.add(session_id)
-        self._is_dirty = True
+        self._mark_dirty()
     
     def get_session_ids(self) -> List[str]:
         """Get all session IDs associated with this conversation.
@@ -324,6 +574,10 @@ class IntegratedMemory(Memory):
     async def add_interaction(self, interaction_type: str, data: Dict[str, Any]) -> bool:
         """Record a new user interaction in memory.
         
+        The user_memory_interactions row is buffered and written in bulk once
+        _INTERACTION_BATCH_SIZE rows are queued, or with the next (debounced)
+        save, flush or close.
+        
         Args:
             interaction_type: Type of interaction (e.g., "project_creation", "conversation")
             data: Data associated with the interaction
@@ -335,152 +589,210 @@ class IntegratedMemory(Memory):
             return False
 
         try:
-            # Add to in-memory cache
-            timestamp = datetime.datetime.utcnow().isoformat()
-            interaction = {
-                "type": interaction_type,
-                "timestamp": timestamp,
-                "data": data,
-            }
-
-            if "interactions" not in self._memory_cache:
-                self._memory_cache["interactions"] = []
-
-            self._memory_cache["interactions"].append(interaction)
-            self._is_dirty = True
+            interaction_type = sys.intern(interaction_type)
+            # Queue for the detailed interaction history table
+            self._queue_interaction(interaction_type, data)
 
-            # Also store in detailed interaction history table
-            await self.db.table("user_memory_interactions").insert(
-                {
-                    "user_id": self.user_id,
-                    "interaction_type": interaction_type,
-                    "interaction_data": data,
-                    "created_at": timestamp,
-                }
-            ).execute()
+            flushed = True
+            if len(self._pending_interactions) >= _INTERACTION_BATCH_SIZE:
+                flushed = await self._flush_pending()
 
             # Process for potential preference learning
             await self._extract_preferences(interaction_type, data)
 
-            return True
+            return flushed
 
         except Exception as e:
             logger.error(f"Error adding interaction for user {self.user_id}: {e}", exc_info=True)
             return False
 
+    def _queue_interaction(
+        self, interaction_type: str, data: Dict[str, Any], timestamp: Optional[str] = None
+    ) -> None:
+        """Queue a user_memory_interactions row for the next flush.
+
+        The table is the only copy of the interaction history; the debounced
+        save this schedules writes the queued row.
+
+        Args:
+            interaction_type: Type of interaction
+            data: Data associated with the interaction
+            timestamp: Time of the interaction; defaults to now
+        """
+        self._pending_interactions.append({
+            "id": str(uuid.uuid4()),
+            "user_id": self.user_id,
+            "interaction_type": interaction_type,
+            "interaction_data": data,
+            "created_at": timestamp or _utcnow_iso(),
+        })
+        self._mark_dirty()
+
     async def _extract_preferences(self, interaction_type: str, data: Dict[str, Any]):
         """Extract and update user preferences from interaction data.
         
+        All preferences extracted from one interaction are stored with a
+        single bulk upsert.
+        
         Args:
             interaction_type: Type of interaction
             data: Interaction data
         """
+        extractor = self._PREFERENCE_EXTRACTORS.get(interaction_type)
+        if extractor is None:
+            return
+
         try:
-            # Example preference extraction logic - customize based on interaction types
-            if interaction_type == "project_creation":
-                # Extract project type preference
-                if "project_type" in data:
-                    await self._update_preference(
-                        "preferred_project_types",
-                        data["project_type"],
-                        "project_creation",
-                    )
-
-                # Extract timeline preference
-                if "timeline" in data:
-                    await self._update_preference(
-                        "timeline_preference", data["timeline"], "project_creation"
-                    )
-
-            elif interaction_type == "contractor_selection":
-                # Extract contractor preference indicators
-                if "selected_contractor" in data and "contractor_attributes" in data:
-                    for attr, value in data["contractor_attributes"].items():
-                        await self._update_preference(
-                            f"contractor_{attr}_preference",
-                            value,
-                            "contractor_selection",
-                        )
+            # preference_key -> row; one row per key keeps the upsert valid
+            pref_rows: Dict[str, Dict[str, Any]] = {}
+            for row in extractor(self, data, _utcnow_iso()):
+                pref_rows[row["preference_key"]] = row
+
+            if pref_rows:
+                # user_preferences references the lazily created memory row
+                if not await self._ensure_persisted():
+                    return
+                # Store in preferences table with confidence scores
+                await self.db.table("user_preferences").upsert(
+                    list(pref_rows.values()), on_conflict="user_id,preference_key"
+                ).execute()
         except Exception as e:
             logger.error(
                 f"Error extracting preferences for user {self.user_id}: {e}",
                 exc_info=True,
             )
 
-    async def _update_preference(self, preference_key: str, value: Any, source: str):
-        """Update a user preference in the database and memory cache.
+    def _extract_project_preferences(
+        self, data: Dict[str, Any], now: str
+    ) -> List[Dict[str, Any]]:
+        """Extract preferences from a project_creation interaction."""
+        rows = []
+        # Extract project type preference
+        if "project_type" in data:
+            rows.append(self._update_preference(
+                "preferred_project_types", data["project_type"], "project_creation", now
+            ))
+
+        # Extract timeline preference
+        if "timeline" in data:
+            rows.append(self._update_preference(
+                "timeline_preference", data["timeline"], "project_creation", now
+            ))
+        return rows
+
+    def _extract_contractor_preferences(
+        self, data: Dict[str, Any], now: str
+    ) -> List[Dict[str, Any]]:
+        """Extract preferences from a contractor_selection interaction."""
+        # Extract contractor preference indicators
+        if "selected_contractor" not in data or "contractor_attributes" not in data:
+            return []
+        return [
+            self._update_preference(
+                f"contractor_{attr}_preference", value, "contractor_selection", now
+            )
+            for attr, value in data["contractor_attributes"].items()
+        ]
+
+    # Interaction type -> preference extractor; types without an entry
+    # carry no preference signal. Customize based on interaction types.
+    _PREFERENCE_EXTRACTORS = {
+        "project_creation": _extract_project_preferences,
+        "contractor_selection": _extract_contractor_preferences,
+    }
+
+    def _update_preference(
+        self, preference_key: str, value: Any, source: str, updated_at: str
+    ) -> Dict[str, Any]:
+        """Update a user preference in the memory cache.
         
         Args:
             preference_key: Preference key (e.g., "preferred_project_types")
             value: Preference value
             source: Source of the preference (e.g., "extraction")
+            updated_at: Timestamp for the preference row
+            
+        Returns:
+            The user_preferences row to upsert for this preference
         """
-        try:
-            # Update in-memory representation
-            if "learned_preferences" not in self._memory_cache:
-                self._memory_cache["learned_preferences"] = {}
-
-            if preference_key not in self._memory_cache["learned_preferences"]:
-                self._memory_cache["learned_preferences"][preference_key] = {
-                    "value": value,
-                    "count": 1,
-                }
+        # Update in-memory representation
+        if "learned_preferences" not in self._memory_cache:
+            self._memory_cache["learned_preferences"] = {}
+
+        if preference_key not in self._memory_cache["learned_preferences"]:
+            self._memory_cache["learned_preferences"][preference_key] = {
+                "value": value,
+                "count": 1,
+            }
+        else:
+            # Simple counting-based preference strengthening
+            current = self._memory_cache["learned_preferences"][preference_key]
+            if current["value"] == value:
+                current["count"] += 1
             else:
-                # Simple counting-based preference strengthening
-                current = self._memory_cache["learned_preferences"][preference_key]
-                if current["value"] == value:
-                    current["count"] += 1
-                else:
-                    # Different value - handle conflict based on count
-                    if current["count"] <= 2:  # Threshold for changing preference
-                        current["value"] = value
-                        current["count"] = 1
-                    # Else keep existing preference as it's stronger
+                # Different value - handle conflict based on count
+                if current["count"] <= 2:  # Threshold for changing preference
+                    current["value"] = value
+                    current["count"] = 1
+                # Else keep existing preference as it's stronger
 
-            self._is_dirty = True
+        self._mark_dirty()
 
-            # Store in preferences table with confidence score
-            count = self._memory_cache["learned_preferences"][preference_key]["count"]
-            confidence = min(0.5 + (count * 0.1), 0.95)  # Simple confidence scaling
-
-            await self.db.table("user_preferences").upsert(
-                {
-                    "user_id": self.user_id,
-                    "preference_key": preference_key,
-                    "preference_value": value,
-                    "confidence": confidence,
-                    "source": source,
-                    "updated_at": datetime.datetime.utcnow().isoformat(),
-                }
-            ).execute()
+        learned = self._memory_cache["learned_preferences"][preference_key]
+        self._pref_values[preference_key] = learned["value"]
+        count = learned["count"]
+        confidence = _CONFIDENCE[min(count, len(_CONFIDENCE) - 1)]  # Simple confidence scaling
 
-        except Exception as e:
-            logger.error(
-                f"Error updating preference for user {self.user_id}: {e}", exc_info=True
-            )
+        return {
+            "user_id": self.user_id,
+            "preference_key": preference_key,
+            "preference_value": value,
+            "confidence": confidence,
+            "source": source,
+            "updated_at": updated_at,
+        }
     
-    def get_recent_interactions(
+    async def get_recent_interactions(
         self, interaction_type: Optional[str] = None, limit: int = 10
     ) -> List[Dict]:
         """Get recent user interactions, optionally filtered by type.
         
+        Reads from user_memory_interactions so Postgres filters, orders and
+        limits using the (user_id[, interaction_type], created_at) indexes.
+        
         Args:
             interaction_type: Optional filter by interaction type
             limit: Maximum number of interactions to return
             
         Returns:
-            List of recent interactions with timestamps
+            List of recent interactions with timestamps, newest first
         """
-        if not self._is_loaded:
-            return []
+        try:
+            if self._pending_interactions:
+                # Make buffered interactions visible to the query
+                await self._flush_pending()
 
-        interactions = self._memory_cache.get("interactions", [])
+            query = (
+                self.db.table("user_memory_interactions")
+                .select("interaction_type, interaction_data, created_at")
+                .eq("user_id", self.user_id)
+            )
+            if interaction_type:
+                query = query.eq("interaction_type", interaction_type)
 
-        if interaction_type:
-            interactions = [i for i in interactions if i["type"] == interaction_type]
+            result = await query.order("created_at", desc=True).limit(limit).execute()
+        except Exception as e:
+            logger.error(f"Error getting recent interactions for user {self.user_id}: {e}", exc_info=True)
+            return []
 
-        # Sort by timestamp (newest first) and limit
-        return sorted(interactions, key=lambda x: x["timestamp"], reverse=True)[:limit]
+        return [
+            {
+                "type": row["interaction_type"],
+                "timestamp": row["created_at"],
+                "data": row["interaction_data"],
+            }
+            for row in result.data or []
+        ]
 
     def get_preference(self, preference_key: str) -> Any:
         """Get a learned user preference.
@@ -494,10 +806,7 @@ class IntegratedMemory(Memory):
         if not self._is_loaded:
             return None
 
-        prefs = self._memory_cache.get("learned_preferences", {})
-        if preference_key in prefs:
-            return prefs[preference_key]["value"]
-        return None
+        return self._pref_values.get(preference_key)
 
     def get_all_preferences(self) -> Dict[str, Any]:
         """Get all learned preferences with their values.
@@ -508,8 +817,7 @@ class IntegratedMemory(Memory):
         if not self._is_loaded:
             return {}
 
-        prefs = self._memory_cache.get("learned_preferences", {})
-        return {k: v["value"] for k, v in prefs.items()}
+        return dict(self._pref_values)
 
     #
     # Implement required Memory interface methods
@@ -545,7 +853,7 @@ class IntegratedMemory(Memory):
             self._memory_cache["context"] = {}
 
         self._memory_cache["context"][key] = value
-        self._is_dirty = True
+        self._mark_dirty()
 
     #
     # A2A Message Routing Integration
@@ -578,10 +886,12 @@ class IntegratedMemory(Memory):
             bool: True if message was recorded successfully, False otherwise
         """
         try:
-            # Record message in agent_messages table
-            timestamp = datetime.datetime.utcnow().isoformat()
+            # Queue message for the agent_messages table
+            role = sys.intern(role)
+            timestamp = _utcnow_iso()
             
-            result = await self.db.table("agent_messages").insert({
+            self._pending_messages.append({
+                "id": str(uuid.uuid4()),
                 "message_id": message_id,
                 "task_id": task_id,
                 "session_id": session_id,
@@ -591,22 +901,32 @@ class IntegratedMemory(Memory):
                 "recipient_agent_id": recipient_agent_id,
                 "created_at": timestamp,
                 "metadata": metadata or {}
-            }).execute()
+            })
             
             # Add session ID to conversation if provided
             if session_id and session_id not in self.session_ids:
                 self.add_session_id(session_id)
             
             # Also record as a regular interaction
+            content_length = len(content)
             interaction_data = {
                 "message_id": message_id,
                 "task_id": task_id,
                 "sender": sender_agent_id,
                 "recipient": recipient_agent_id,
-                "content_summary": content[:100] + "..." if len(content) > 100 else content,
+                "content_summary": (
+                    content if content_length <= _SUMMARY_LENGTH
+                    else f"{content[:_SUMMARY_LENGTH]}..."
+                ),
+                "content_length": content_length,
                 "role": role
             }
-            await self.add_interaction("agent_message", interaction_data)
+            if self._is_loaded or await self.load():
+                self._queue_interaction("agent_message", interaction_data, timestamp)
+            
+            # Both rows go out in one flush
+            if not await self._flush_pending():
+                return False
             
             logger.info(f"Recorded agent message {message_id} from {sender_agent_id} to {recipient_agent_id}")
             return True
@@ -638,10 +958,11 @@ class IntegratedMemory(Memory):
             bool: True if routing was recorded successfully, False otherwise
         """
         try:
-            # Record routing in message_routing_logs table
-            timestamp = datetime.datetime.utcnow().isoformat()
+            # Queue routing for the message_routing_logs table
+            timestamp = _utcnow_iso()
             
-            result = await self.db.table("message_routing_logs").insert({
+            self._pending_routing.append({
+                "id": str(uuid.uuid4()),
                 "message_id": message_id,
                 "task_id": task_id,
                 "sender_agent_id": sender_agent_id,
@@ -649,7 +970,10 @@ class IntegratedMemory(Memory):
                 "route_status": route_status,
                 "route_timestamp": timestamp,
                 "metadata": metadata or {}
-            }).execute()
+            })
+            
+            if not await self._flush_pending():
+                return False
             
             logger.info(f"Recorded message routing: {message_id} from {sender_agent_id} to {recipient_agent_id} ({route_status})")
             return True
@@ -658,6 +982,103 @@ class IntegratedMemory(Memory):
             logger.error(f"Error recording message routing: {e}", exc_info=True)
             return False
     
+    async def _flush_pending(self) -> bool:
+        """Write all queued agent message, interaction, routing and history rows.
+        
+        Callers that queue rows before the flush starts share it, so concurrent
+        callers wait on a single round of requests that includes their rows.
+        
+        Returns:
+            bool: True if all queued rows were written, False otherwise
+        """
+        if self._pending_flush is None:
+            self._pending_flush = asyncio.ensure_future(self._write_pending())
+        return await asyncio.shield(self._pending_flush)
+    
+    async def _write_pending(self) -> bool:
+        """Take the queued rows and write each table's rows with one bulk request.
+        
+        Every row carries a client-generated key (its id, or conversation_id
+        and seq for history) and is upserted on it. A table whose request
+        fails has its rows queued again, so the next flush retries them
+        without duplicating any that were written.
+        """
+        # Rows queued from here on go to the next flush
+        self._pending_flush = None
+        if self._pending_interactions or self._pending_history:
+            # These rows reference user_memories; leave them queued until the
+            # row exists
+            if not await self._ensure_persisted():
+                return False
+        batches = [
+            (attr, table, on_conflict, getattr(self, attr))
+            for attr, table, on_conflict in _PENDING_TABLES
+            if getattr(self, attr)
+        ]
+        for attr, _, _, _ in batches:
+            setattr(self, attr, [])
+        
+        results = await asyncio.gather(
+            *(
+                self.db.table(table).upsert(rows, on_conflict=on_conflict).execute()
+                for _, table, on_conflict, rows in batches
+            ),
+            return_exceptions=True,
+        )
+        written = True
+        for (attr, table, _, rows), result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error flushing queued {table} rows for user {self.user_id}: {result}", exc_info=result)
+                # Retry these rows on the next flush, ahead of any queued since
+                getattr(self, attr)[:0] = rows
+                written = False
+        return written
+    
+    async def _ensure_persisted(self) -> bool:
+        """Create the user_memories row if it has not been written yet.
+        
+        Memory for a new user is only held locally until something references
+        the row. An existing row is left untouched; the next save writes any
+        local changes.
+        
+        Returns:
+            bool: True if the row exists, False otherwise
+        """
+        if self._is_persisted:
+            return True
+        
+        try:
+            await (
+                self.db.table("user_memories")
+                .upsert(
+                    {
+                        "user_id": self.user_id,
+                        "memory_data": self._memory_cache,
+                        "updated_at": _utcnow_iso(),
+                    },
+                    on_conflict="user_id",
+                    ignore_duplicates=True,
+                )
+                .execute()
+            )
+        except Exception as e:
+            logger.error(f"Error creating memory row for user {self.user_id}: {e}", exc_info=True)
+            return False
+        
+        self._is_persisted = True
+        return True
+    
+    async def flush(self) -> bool:
+        """Write queued rows and save the memory blob concurrently.
+        
+        Call at turn boundaries to persist everything recorded so far.
+        
+        Returns:
+            bool: True if everything was written successfully, False otherwise
+        """
+        flushed, saved = await asyncio.gather(self._flush_pending(), self.save())
+        return flushed and saved
+    
     async def get_agent_messages(
         self,
         task_id: Optional[str] = None,
@@ -687,8 +1108,9 @@ class IntegratedMemory(Memory):
                 query = query.eq("session_id", session_id)
                 
             if agent_id:
-                # Query for messages where agent is either sender or recipient
-                query = query.or_(f"sender_agent_id.eq.{agent_id},recipient_agent_id.eq.{agent_id}")
+                # Query for messages where agent is either sender or recipient;
+                # participants holds both and is GIN-indexed
+                query = query.contains("participants", [agent_id])
             
             # Execute query with order and limit
             result = await query.order("created_at", desc=True).limit(limit).execute()
@@ -6,17 +6,39 @@ Provides a simplified interface to the integrated memory system,
 handling database connections and memory instance management.
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, Optional, Any, List
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Any, List, Tuple
 
-from supabase import create_client, Client
+from supabase import acreate_client, AsyncClient
 
 from .integrated_memory import IntegratedMemory
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Maximum number of memory saves save_all keeps in flight at once
+_SAVE_CONCURRENCY = 16
+
+
+# (url, key, client) of the client shared by every MemoryManager
+_supabase: Optional[Tuple[str, str, AsyncClient]] = None
+
+
+async def _get_supabase(url: str, key: str) -> AsyncClient:
+    """Create the Supabase client shared by every MemoryManager.
+    
+    The client (and its HTTP connection pool) is built once per process for
+    a given URL and key; later calls return the same instance.
+    """
+    global _supabase
+    if _supabase is None or _supabase[:2] != (url, key):
+        _supabase = (url, key, await acreate_client(url, key))
+    return _supabase[2]
+
 class MemoryManager:
     """Manages memory instances for different users and agents.
     
@@ -24,13 +46,30 @@ class MemoryManager:
     handling database connections and memory instance management.
     """
     
-    def __init__(self):
-        """Initialize the memory manager."""
-        self._db: Optional[Client] = None
-        self._memory_instances: Dict[str, IntegratedMemory] = {}
+    def __init__(self, max_instances: int = 1024, idle_ttl: float = 1800.0):
+        """Initialize the memory manager.
+        
+        Args:
+            max_instances: Maximum number of loaded user memories kept in
+                process; the least recently used one is saved and evicted
+            idle_ttl: Seconds a memory may go unused before it is saved and
+                evicted
+        """
+        self._db: Optional[AsyncClient] = None
+        # user_id -> memory, least recently used first
+        self._memory_instances: "OrderedDict[str, IntegratedMemory]" = OrderedDict()
+        self._max_instances = max_instances
+        # user_id -> time.monotonic() of the last get_user_memory for that user
+        self._last_access: Dict[str, float] = {}
+        self._idle_ttl = idle_ttl
+        # Per-user locks so concurrent first requests share a single load
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        # user_id -> background close() of an evicted memory
+        self._closing: Dict[str, "asyncio.Task[bool]"] = {}
+        self._init_lock = asyncio.Lock()
         self._initialized = False
     
-    def initialize(self) -> bool:
+    async def initialize(self) -> bool:
         """Initialize the memory manager with database connection.
         
         Returns:
@@ -46,7 +85,7 @@ class MemoryManager:
                 return False
             
             # Initialize Supabase client
-            self._db = create_client(supabase_url, supabase_key)
+            self._db = await _get_supabase(supabase_url, supabase_key)
             self._initialized = True
             logger.info("Memory manager initialized successfully.")
             return True
@@ -55,6 +94,18 @@ class MemoryManager:
             logger.error(f"Failed to initialize memory manager: {e}", exc_info=True)
             return False
     
+    async def _ensure_initialized(self) -> bool:
+        """Initialize on first use; later calls only check the flag.
+        
+        Returns:
+            bool: True if the memory manager is initialized, False otherwise
+        """
+        if self._initialized:
+            return True
+        async with self._init_lock:
+            # Concurrent first callers share one initialization
+            return self._initialized or await self.initialize()
+    
     async def get_user_memory(self, user_id: str) -> Optional[IntegratedMemory]:
         """Get or create a memory instance for a user.
         
@@ -64,59 +115,160 @@ class MemoryManager:
         Returns:
             IntegratedMemory instance or None if initialization failed
         """
-        if not self._initialized:
-            if not self.initialize():
-                logger.error("Cannot get user memory - memory manager not initialized.")
-                return None
+        if not await self._ensure_initialized():
+            logger.error("Cannot get user memory - memory manager not initialized.")
+            return None
         
         # Check if memory instance already exists
-        if user_id in self._memory_instances:
-            return self._memory_instances[user_id]
+        memory = self.get_cached(user_id)
+        if memory is not None:
+            self._evict_excess()
+            return memory
         
+        lock = self._load_locks.setdefault(user_id, asyncio.Lock())
         try:
-            # Create new memory instance
-            memory = IntegratedMemory(self._db, user_id)
-            # Load memory from database
-            await memory.load()
-            # Store in cache
-            self._memory_instances[user_id] = memory
+            async with lock:
+                # Another request may have loaded it while we waited
+                memory = self._memory_instances.get(user_id)
+                if memory is not None:
+                    self._touch(user_id)
+                    return memory
+                
+                closing = self._closing.get(user_id)
+                if closing is not None:
+                    # Reload only after the evicted copy's writes have landed
+                    await asyncio.wait([closing])
+                
+                # Create new memory instance
+                memory = IntegratedMemory(self._db, user_id)
+                # Load memory from database
+                await memory.load()
+                # Store in cache
+                self._memory_instances[user_id] = memory
+                self._touch(user_id)
+            
+            self._evict_excess()
             return memory
         
         except Exception as e:
             logger.error(f"Failed to get memory for user {user_id}: {e}", exc_info=True)
             return None
+        finally:
+            if not lock.locked():
+                self._load_locks.pop(user_id, None)
+    
+    def get_cached(self, user_id: str) -> Optional[IntegratedMemory]:
+        """Get a user's memory if it is already loaded, without awaiting.
+        
+        Callers on hot paths can use
+        ``manager.get_cached(user_id) or await manager.get_user_memory(user_id)``.
+        
+        Args:
+            user_id: User ID to get memory for
+            
+        Returns:
+            The cached IntegratedMemory instance, or None if it is not loaded
+        """
+        memory = self._memory_instances.get(user_id)
+        if memory is not None:
+            self._touch(user_id)
+        return memory
+    
+    def _touch(self, user_id: str) -> None:
+        """Mark a cached memory as the most recently used."""
+        self._memory_instances.move_to_end(user_id)
+        self._last_access[user_id] = time.monotonic()
+    
+    def _evict_excess(self) -> None:
+        """Drop memories beyond max_instances or idle past idle_ttl.
+        
+        Entries are ordered by last access, so only the oldest ones are
+        checked and expiry needs no background task. Evicted memories are
+        closed in tracked background tasks, so callers never wait on another
+        user's writes; save_all waits for them.
+        """
+        expire_before = time.monotonic() - self._idle_ttl
+        while self._memory_instances:
+            user_id = next(iter(self._memory_instances))
+            if (
+                len(self._memory_instances) <= self._max_instances
+                and self._last_access.get(user_id, 0.0) > expire_before
+            ):
+                break
+            memory = self._memory_instances.pop(user_id)
+            self._last_access.pop(user_id, None)
+            task = asyncio.get_running_loop().create_task(self._close_evicted(user_id, memory))
+            self._closing[user_id] = task
+            task.add_done_callback(self._forget_closed)
+    
+    def _forget_closed(self, task: "asyncio.Task[bool]") -> None:
+        """Stop tracking a finished close, unless a newer one replaced it."""
+        for user_id, closing in list(self._closing.items()):
+            if closing is task:
+                del self._closing[user_id]
+    
+    async def _close_evicted(self, user_id: str, memory: IntegratedMemory) -> bool:
+        """Write an evicted memory's pending changes.
+        
+        Returns:
+            bool: True if the memory was saved successfully, False otherwise
+        """
+        try:
+            if await memory.close():
+                return True
+            logger.error(f"Failed to save evicted memory for user {user_id}")
+        except Exception as e:
+            logger.error(f"Exception saving evicted memory for user {user_id}: {e}", exc_info=True)
+        return False
     
     async def save_all(self) -> bool:
         """Save all memory instances.
         
+        Also waits for evicted memories that are still being closed.
+        
         Returns:
             bool: True if all memory instances were saved successfully, False otherwise
         """
+        # _close_evicted logs its own failures and never raises
+        closed = await asyncio.gather(*self._closing.values())
+        
         if not self._memory_instances:
             logger.info("No memory instances to save.")
-            return True
+            return all(closed)
+        
+        # Saves are independent, so run them concurrently up to a bound
+        semaphore = asyncio.Semaphore(_SAVE_CONCURRENCY)
+        
+        async def _save_one(memory: IntegratedMemory) -> bool:
+            async with semaphore:
+                return await memory.save()
+        
+        # Snapshot the instances; the cache may change while saves are in flight
+        instances = list(self._memory_instances.items())
+        results = await asyncio.gather(
+            *(_save_one(memory) for _, memory in instances),
+            return_exceptions=True,
+        )
         
-        success = True
-        for user_id, memory in self._memory_instances.items():
-            try:
-                if not await memory.save():
-                    logger.error(f"Failed to save memory for user {user_id}")
-                    success = False
-            except Exception as e:
-                logger.error(f"Exception saving memory for user {user_id}: {e}", exc_info=True)
+        success = all(closed)
+        for (user_id, _), result in zip(instances, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Exception saving memory for user {user_id}: {result}", exc_info=result)
+                success = False
+            elif not result:
+                logger.error(f"Failed to save memory for user {user_id}")
                 success = False
         
         return success
     
-    def get_db(self) -> Optional[Client]:
+    async def get_db(self) -> Optional[AsyncClient]:
         """Get the Supabase client instance.
         
         Returns:
             Supabase client instance or None if not initialized
         """
-        if not self._initialized:
-            if not self.initialize():
-                return None
+        if not await self._ensure_initialized():
+            return None
         
         return self._db
     
@@ -129,17 +281,22 @@ class MemoryManager:
         Returns:
             bool: True if memory was cleared successfully, False otherwise
         """
-        if not self._initialized:
-            if not self.initialize():
-                return False
+        if not await self._ensure_initialized():
+            return False
         
         try:
+            closing = self._closing.get(user_id)
+            if closing is not None:
+                # Let the evicted copy finish writing so it can't recreate the row
+                await asyncio.wait([closing])
+            
             # Remove memory from database
             await self._db.table("user_memories").delete().eq("user_id", user_id).execute()
             
             # Remove from cache
             if user_id in self._memory_instances:
                 del self._memory_instances[user_id]
+                self._last_access.pop(user_id, None)
             
             logger.info(f"Memory cleared for user {user_id}")
             return True
@@ -158,9 +315,8 @@ class MemoryManager:
         Returns:
             Dictionary of preferences
         """
-        if not self._initialized:
-            if not self.initialize():
-                return {}
+        if not await self._ensure_initialized():
+            return {}
         
         try:
             # Query database directly for preferences
@@ -198,9 +354,8 @@ class MemoryManager:
         Returns:
             List of interactions
         """
-        if not self._initialized:
-            if not self.initialize():
-                return []
+        if not await self._ensure_initialized():
+            return []
         
         try:
             # Build query
@@ -222,7 +377,55 @@ class MemoryManager:
         except Exception as e:
             logger.error(f"Failed to get interactions for user {user_id}: {e}", exc_info=True)
             return []
-    
+
+    async def get_user_snapshot(
+        self,
+        user_id: str,
+        min_confidence: float = 0.5,
+        interaction_type: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Get user preferences and interactions in a single request.
+
+        Equivalent to get_user_preferences and get_user_interactions, but
+        both are read by the get_user_snapshot database function.
+
+        Args:
+            user_id: User ID to get the snapshot for
+            min_confidence: Minimum preference confidence level (0-1)
+            interaction_type: Optional interaction type to filter by
+            limit: Maximum number of interactions to return
+
+        Returns:
+            Dictionary with "preferences" (key -> value) and "interactions"
+            (newest first)
+        """
+        snapshot: Dict[str, Any] = {"preferences": {}, "interactions": []}
+        if not await self._ensure_initialized():
+            return snapshot
+
+        try:
+            result = await self._db.rpc(
+                "get_user_snapshot",
+                {
+                    "p_user_id": user_id,
+                    "p_min_confidence": min_confidence,
+                    "p_interaction_type": interaction_type,
+                    "p_limit": limit,
+                },
+            ).execute()
+        except Exception as e:
+            logger.error(f"Failed to get snapshot for user {user_id}: {e}", exc_info=True)
+            return snapshot
+
+        data = result.data or {}
+        snapshot["preferences"] = {
+            pref["preference_key"]: pref["preference_value"]
+            for pref in data.get("preferences") or []
+        }
+        snapshot["interactions"] = data.get("interactions") or []
+        return snapshot
+
     async def get_agent_messages(
         self,
         task_id: Optional[str] = None,
@@ -241,9 +444,8 @@ class MemoryManager:
         Returns:
             List of agent messages
         """
-        if not self._initialized:
-            if not self.initialize():
-                return []
+        if not await self._ensure_initialized():
+            return []
         
         try:
             # Build query
@@ -256,8 +458,9 @@ class MemoryManager:
                 query = query.eq("session_id", session_id)
                 
             if agent_id:
-                # Query for messages where agent is either sender or recipient
-                query = query.or_(f"sender_agent_id.eq.{agent_id},recipient_agent_id.eq.{agent_id}")
+                # Query for messages where agent is either sender or recipient;
+                # participants holds both and is GIN-indexed
+                query = query.contains("participants", [agent_id])
             
             # Execute query with order and limit
             result = await query.order("created_at", desc=True).limit(limit).execute()
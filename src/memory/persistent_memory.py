@@ -5,17 +5,31 @@ Persistent memory implementation using Supabase as backend storage.
 This module provides persistent memory capabilities for InstaBids agents.
 """
 
+import asyncio
 import json
 import logging
+import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
-from supabase import Client
+from supabase import AsyncClient
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Queued interaction rows that trigger an immediate bulk insert
+_INTERACTION_BATCH_SIZE = 32
+
+# Seconds a queued interaction may wait before it is inserted
+_INTERACTION_FLUSH_INTERVAL = 0.5
+
+# Preference reads are served from memory for this long after a fetch
+_PREFERENCE_CACHE_TTL_SECONDS = 60
+
+# Marks a key missing from memory, since None is a valid stored value
+_MISSING = object()
+
 
 class PersistentMemory:
     """Persistent memory with Supabase backend storage.
@@ -24,7 +38,7 @@ class PersistentMemory:
     preferences, conversation contexts, and interaction history.
     """
     
-    def __init__(self, db: Client, user_id: str):
+    def __init__(self, db: AsyncClient, user_id: str):
         """Initialize persistent memory for a user.
         
         Args:
@@ -33,9 +47,22 @@ class PersistentMemory:
         """
         self.db = db
         self.user_id = user_id
+        # Parsed once and kept as text, the form sent in filters, rows and RPCs
+        self._user_uuid = str(self._ensure_uuid(user_id))
         self._data = {}
         self._dirty = False
+        # Top-level keys set or deleted since the last save
+        self._changed_keys: Set[str] = set()
+        self._deleted_keys: Set[str] = set()
         self._loaded = False
+        # user_memory_interactions rows waiting for the next bulk insert
+        self._pending_interactions: List[Dict[str, Any]] = []
+        # Timer that inserts queued interactions once the oldest has aged out
+        self._flush_task: Optional["asyncio.Task[bool]"] = None
+        # preference_key -> (expires_at, value or _MISSING)
+        self._preference_cache: Dict[str, Tuple[float, Any]] = {}
+        # min_confidence -> (expires_at, preferences)
+        self._all_preferences_cache: Dict[float, Tuple[float, Dict[str, Any]]] = {}
         
     async def load(self) -> bool:
         """Load memory from database.
@@ -44,28 +71,17 @@ class PersistentMemory:
             bool: True if memory was loaded successfully, False otherwise
         """
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
-            
-            # Check if memory exists for this user
-            response = self.db.table('user_memories').select('*').eq('user_id', user_uuid).execute()
-            
-            if response.data and len(response.data) > 0:
-                # Memory exists, load it
-                self._data = response.data[0]['memory_data']
-                logger.info(f"Loaded memory for user {self.user_id}")
-            else:
-                # No memory exists, create a new one
-                logger.info(f"No memory found for user {self.user_id}, creating new memory")
-                new_memory = {
-                    'user_id': user_uuid,
-                    'memory_data': {}
-                }
-                response = self.db.table('user_memories').insert(new_memory).execute()
-                self._data = {}
+            # Fetch the memory, creating an empty one if none exists, in one round trip
+            response = await self.db.rpc('ensure_user_memory', {'p_user_id': self._user_uuid}).execute()
+            self._data = response.data or {}
+            logger.info(f"Loaded memory for user {self.user_id}")
             
             self._loaded = True
             self._dirty = False
+            self._changed_keys.clear()
+            self._deleted_keys.clear()
+            self._preference_cache.clear()
+            self._all_preferences_cache.clear()
             return True
         except Exception as e:
             logger.error(f"Error loading memory: {e}")
@@ -74,31 +90,47 @@ class PersistentMemory:
     async def save(self) -> bool:
         """Save memory to database if it has changed.
         
+        Only the top-level keys set or deleted since the last save are sent;
+        the database merges them into the stored memory_data. Interactions
+        queued by add_interaction are written by the same request.
+        
         Returns:
             bool: True if memory was saved successfully, False otherwise
         """
         if not self._loaded:
+            await self._flush_interactions()
             logger.warning("Attempted to save memory before loading it")
             return False
         
         if not self._dirty:
             logger.debug("Memory not dirty, skipping save")
-            return True
+            return await self._flush_interactions()
         
+        rows = self._pending_interactions
+        self._pending_interactions = []
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
-            
-            # Update memory data
-            self.db.table('user_memories').update({
-                'memory_data': self._data,
-                'updated_at': datetime.now().isoformat()
-            }).eq('user_id', user_uuid).execute()
+            # Patch the changed keys and insert queued interactions in one round trip
+            await self.db.rpc('sync_user_memory', {
+                'p_user_id': self._user_uuid,
+                'p_set': {key: self._data[key] for key in self._changed_keys},
+                'p_unset': list(self._deleted_keys),
+                'p_interactions': [
+                    {
+                        'interaction_type': row['interaction_type'],
+                        'interaction_data': row['interaction_data']
+                    }
+                    for row in rows
+                ]
+            }).execute()
             
             logger.info(f"Saved memory for user {self.user_id}")
             self._dirty = False
+            self._changed_keys.clear()
+            self._deleted_keys.clear()
             return True
         except Exception as e:
+            # Keep the rows so the next save or flush retries them
+            self._pending_interactions[:0] = rows
             logger.error(f"Error saving memory: {e}")
             return False
     
@@ -121,6 +153,10 @@ class PersistentMemory:
     def set(self, key: str, value: Any) -> None:
         """Set a value in memory.
         
+        Setting a key to a value equal to the stored one leaves memory clean.
+        Passing back the stored object itself always marks the key changed,
+        since callers mutate values in place before setting them.
+        
         Args:
             key: Key to set
             value: Value to associate with the key
@@ -129,7 +165,13 @@ class PersistentMemory:
             logger.warning(f"Attempted to set memory key '{key}' before loading")
             return
         
+        prev = self._data.get(key, _MISSING)
+        if prev is not value and prev == value:
+            return
+        
         self._data[key] = value
+        self._changed_keys.add(key)
+        self._deleted_keys.discard(key)
         self._dirty = True
     
     def delete(self, key: str) -> bool:
@@ -147,6 +189,8 @@ class PersistentMemory:
         
         if key in self._data:
             del self._data[key]
+            self._deleted_keys.add(key)
+            self._changed_keys.discard(key)
             self._dirty = True
             return True
         return False
@@ -154,6 +198,11 @@ class PersistentMemory:
     async def add_interaction(self, interaction_type: str, data: Dict[str, Any]) -> bool:
         """Record a user interaction.
         
+        The row is queued and inserted in bulk once _INTERACTION_BATCH_SIZE
+        rows are waiting, _INTERACTION_FLUSH_INTERVAL seconds after it was
+        queued, or on the next save or read of recent interactions, whichever
+        comes first.
+        
         Args:
             interaction_type: Type of interaction (e.g., "project_creation", "conversation")
             data: Data associated with the interaction
@@ -161,24 +210,90 @@ class PersistentMemory:
         Returns:
             bool: True if interaction was recorded successfully, False otherwise
         """
+        # Queue interaction
+        self._pending_interactions.append({
+            'user_id': self._user_uuid,
+            'interaction_type': interaction_type,
+            'interaction_data': data
+        })
+        logger.info(f"Recorded {interaction_type} interaction for user {self.user_id}")
+        
+        if len(self._pending_interactions) >= _INTERACTION_BATCH_SIZE:
+            return await self._flush_interactions()
+        self._schedule_flush()
+        return True
+    
+    def _schedule_flush(self) -> None:
+        """Start the flush timer for queued interactions if it isn't running.
+        
+        The timer is not restarted by later rows, so no row waits longer than
+        _INTERACTION_FLUSH_INTERVAL. Outside a running event loop nothing is
+        scheduled and rows wait for the next save.
+        """
+        if self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._timed_flush())
+    
+    async def _timed_flush(self) -> bool:
+        """Insert queued interactions once the flush interval has passed."""
+        await asyncio.sleep(_INTERACTION_FLUSH_INTERVAL)
+        # Detach first so rows queued during the insert start a new timer
+        self._flush_task = None
+        return await self._flush_interactions()
+    
+    async def _flush_interactions(self) -> bool:
+        """Insert all queued interactions with a single request.
+        
+        Returns:
+            bool: True if the queued interactions were written, False otherwise
+        """
+        if not self._pending_interactions:
+            return True
+        
+        rows = self._pending_interactions
+        self._pending_interactions = []
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
+            await self.db.table('user_memory_interactions').insert(rows).execute()
+            return True
+        except Exception as e:
+            # Keep the rows so the next flush retries them
+            self._pending_interactions[:0] = rows
+            logger.error(f"Error recording interactions: {e}")
+            return False
+    
+    async def add_interactions_bulk(self, interactions: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Record several user interactions in one round trip.
+        
+        Args:
+            interactions: List of (interaction_type, data) pairs, as passed to add_interaction
             
-            # Record interaction
-            interaction = {
-                'user_id': user_uuid,
-                'interaction_type': interaction_type,
-                'interaction_data': data
-            }
-            self.db.table('user_memory_interactions').insert(interaction).execute()
-            logger.info(f"Recorded {interaction_type} interaction for user {self.user_id}")
+        Returns:
+            bool: True if interactions were recorded successfully, False otherwise
+        """
+        if not interactions:
+            return True
+        
+        try:
+            rows = [
+                {
+                    'user_id': self._user_uuid,
+                    'interaction_type': interaction_type,
+                    'interaction_data': data
+                }
+                for interaction_type, data in interactions
+            ]
+            await self.db.table('user_memory_interactions').insert(rows).execute()
+            logger.info(f"Recorded {len(rows)} interactions for user {self.user_id}")
             return True
         except Exception as e:
-            logger.error(f"Error recording interaction: {e}")
+            logger.error(f"Error recording interactions: {e}")
             return False
     
-    def get_recent_interactions(self, interaction_type: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_recent_interactions(self, interaction_type: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent interactions.
         
         Args:
@@ -189,28 +304,30 @@ class PersistentMemory:
             List of recent interactions with timestamps
         """
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
+            # Make queued interactions visible to the query
+            await self._flush_interactions()
             
-            # Build query
-            query = self.db.table('user_memory_interactions').select('*').eq('user_id', user_uuid)
+            # Build query; user_memory_interactions_user[_type]_recent_idx serve
+            # the filter and ordering
+            query = self.db.table('user_memory_interactions').select(
+                'interaction_type,interaction_data,created_at'
+            ).eq('user_id', self._user_uuid)
             
             if interaction_type:
                 query = query.eq('interaction_type', interaction_type)
             
             # Execute query with limit and order by created_at
-            response = query.order('created_at', desc=True).limit(limit).execute()
+            response = await query.order('created_at', desc=True).limit(limit).execute()
             
             # Format interactions for return
-            interactions = []
-            for item in response.data:
-                interactions.append({
+            return [
+                {
                     'type': item['interaction_type'],
                     'data': item['interaction_data'],
                     'timestamp': item['created_at']
-                })
-            
-            return interactions
+                }
+                for item in response.data
+            ]
         except Exception as e:
             logger.error(f"Error retrieving interactions: {e}")
             return []
@@ -228,41 +345,31 @@ class PersistentMemory:
             bool: True if preference was set successfully, False otherwise
         """
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
-            
-            # Check if preference exists
-            response = self.db.table('user_preferences').select('*').eq('user_id', user_uuid).eq('preference_key', key).execute()
-            
-            if response.data and len(response.data) > 0:
-                # Update existing preference
-                pref_id = response.data[0]['id']
-                self.db.table('user_preferences').update({
-                    'preference_value': value,
-                    'confidence': max(0.0, min(1.0, confidence)),  # Clamp to [0, 1]
-                    'source': source,
-                    'updated_at': datetime.now().isoformat()
-                }).eq('id', pref_id).execute()
-            else:
-                # Create new preference
-                preference = {
-                    'user_id': user_uuid,
-                    'preference_key': key,
-                    'preference_value': value,
-                    'confidence': max(0.0, min(1.0, confidence)),  # Clamp to [0, 1]
-                    'source': source
-                }
-                self.db.table('user_preferences').insert(preference).execute()
+            # Insert or update in one request; user_preferences is unique on
+            # (user_id, preference_key)
+            await self.db.table('user_preferences').upsert({
+                'user_id': self._user_uuid,
+                'preference_key': key,
+                'preference_value': value,
+                'confidence': max(0.0, min(1.0, confidence)),  # Clamp to [0, 1]
+                'source': source,
+                'updated_at': datetime.now().isoformat()
+            }, on_conflict='user_id,preference_key').execute()
             
+            # Write through; confidence filters may now include or drop the key
+            self._preference_cache[key] = (time.monotonic() + _PREFERENCE_CACHE_TTL_SECONDS, value)
+            self._all_preferences_cache.clear()
             logger.info(f"Set preference '{key}' for user {self.user_id}")
             return True
         except Exception as e:
             logger.error(f"Error setting preference: {e}")
             return False
     
-    def get_preference(self, key: str, default: Any = None) -> Any:
+    async def get_preference(self, key: str, default: Any = None) -> Any:
         """Get a user preference.
         
+        Values, including misses, are reused for _PREFERENCE_CACHE_TTL_SECONDS.
+        
         Args:
             key: Preference key to retrieve
             default: Default value if preference doesn't exist
@@ -270,41 +377,50 @@ class PersistentMemory:
         Returns:
             The preference value, or default if not found
         """
+        now = time.monotonic()
+        cached = self._preference_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return default if cached[1] is _MISSING else cached[1]
+        
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
-            
             # Get preference
-            response = self.db.table('user_preferences').select('*').eq('user_id', user_uuid).eq('preference_key', key).execute()
+            response = await self.db.table('user_preferences').select('preference_value').eq('user_id', self._user_uuid).eq('preference_key', key).maybe_single().execute()
             
-            if response.data and len(response.data) > 0:
-                return response.data[0]['preference_value']
-            return default
+            value = response.data['preference_value'] if response.data else _MISSING
+            self._preference_cache[key] = (now + _PREFERENCE_CACHE_TTL_SECONDS, value)
+            return default if value is _MISSING else value
         except Exception as e:
             logger.error(f"Error retrieving preference: {e}")
             return default
     
-    def get_all_preferences(self, min_confidence: float = 0.0) -> Dict[str, Any]:
+    async def get_all_preferences(self, min_confidence: float = 0.0) -> Dict[str, Any]:
         """Get all user preferences with confidence above threshold.
         
+        Results are reused per threshold for _PREFERENCE_CACHE_TTL_SECONDS.
+        
         Args:
             min_confidence: Minimum confidence threshold (0-1)
             
         Returns:
             Dictionary of preference key-value pairs
         """
+        now = time.monotonic()
+        cached = self._all_preferences_cache.get(min_confidence)
+        if cached is not None and cached[0] > now:
+            return dict(cached[1])
+        
         try:
-            # Convert string user_id to UUID if needed
-            user_uuid = self._ensure_uuid(self.user_id)
-            
             # Get preferences with confidence filter
-            response = self.db.table('user_preferences').select('*').eq('user_id', user_uuid).gte('confidence', min_confidence).execute()
+            response = await self.db.table('user_preferences').select('preference_key,preference_value').eq('user_id', self._user_uuid).gte('confidence', min_confidence).execute()
             
+            expires_at = now + _PREFERENCE_CACHE_TTL_SECONDS
             preferences = {}
             for pref in response.data:
                 preferences[pref['preference_key']] = pref['preference_value']
+                self._preference_cache[pref['preference_key']] = (expires_at, pref['preference_value'])
             
-            return preferences
+            self._all_preferences_cache[min_confidence] = (expires_at, preferences)
+            return dict(preferences)
         except Exception as e:
             logger.error(f"Error retrieving preferences: {e}")
             return {}
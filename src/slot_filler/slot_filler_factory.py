@@ -5,8 +5,9 @@ Factory for creating slot fillers with memory integration.
 This module provides a factory class for creating slot fillers with persistent memory.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Set, Callable
+from typing import Any, Dict, List, Optional, FrozenSet, Tuple, Callable
 
 from ..memory.persistent_memory import PersistentMemory
 from ..memory.conversation_state import ConversationState
@@ -14,6 +15,14 @@ from ..memory.conversation_state import ConversationState
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Longest time update_from_message defers writing conversation state
+_SAVE_INTERVAL = 2.0
+
+
+def _state_key(conversation_id: str) -> str:
+    """Memory key holding the state of one conversation."""
+    return f"conversation_state_{conversation_id}"
+
 
 class SlotFiller:
     """Manages slot filling with persistent memory.
@@ -30,6 +39,8 @@ class SlotFiller:
         """
         self.memory = memory
         self.state = state
+        # Timer that saves memory after update_from_message
+        self._save_task: Optional["asyncio.Task[bool]"] = None
     
     async def extract_slots_from_message(self, message: str, extractors: Dict[str, Callable[[str], Optional[Any]]]) -> Dict[str, Any]:
         """Extract slots from a text message.
@@ -42,15 +53,18 @@ class SlotFiller:
             Dictionary of extracted slots and their values
         """
         extracted = {}
+        known_slots = self.state.known_slots
+        set_slot = self.state.set_slot
         for slot_name, extractor in extractors.items():
-            if slot_name in self.state.required_slots or slot_name in self.state.optional_slots:
-                try:
-                    value = extractor(message)
-                    if value is not None:
-                        self.state.set_slot(slot_name, value)
-                        extracted[slot_name] = value
-                except Exception as e:
-                    logger.error(f"Error extracting slot '{slot_name}': {e}")
+            if slot_name not in known_slots:
+                continue
+            try:
+                value = extractor(message)
+                if value is not None:
+                    set_slot(slot_name, value)
+                    extracted[slot_name] = value
+            except Exception as e:
+                logger.error(f"Error extracting slot '{slot_name}': {e}")
         
         # Record interaction if slots were extracted
         if extracted:
@@ -77,15 +91,18 @@ class SlotFiller:
         
         # Extract slots from image
         extracted = {}
+        known_slots = self.state.known_slots
+        set_slot = self.state.set_slot
         for slot_name, extractor in extractors.items():
-            if slot_name in self.state.required_slots or slot_name in self.state.optional_slots:
-                try:
-                    value = extractor(image_data)
-                    if value is not None:
-                        self.state.set_slot(slot_name, value)
-                        extracted[slot_name] = value
-                except Exception as e:
-                    logger.error(f"Error extracting slot '{slot_name}' from image: {e}")
+            if slot_name not in known_slots:
+                continue
+            try:
+                value = extractor(image_data)
+                if value is not None:
+                    set_slot(slot_name, value)
+                    extracted[slot_name] = value
+            except Exception as e:
+                logger.error(f"Error extracting slot '{slot_name}' from image: {e}")
         
         # Record interaction if slots were extracted
         if extracted:
@@ -100,17 +117,27 @@ class SlotFiller:
     async def update_from_message(self, role: str, content: str) -> None:
         """Update conversation history with a new message.
         
+        The state is stored in memory straight away, but written to the
+        database at most _SAVE_INTERVAL seconds later, so a burst of messages
+        costs one write. Call save() to write immediately.
+        
         Args:
             role: Role of the sender (e.g., "user", "assistant")
             content: Message content
         """
         self.state.add_message(role, content)
         
-        # Save state in memory
-        conversation_states = self.memory.get("conversation_states", {})
-        conversation_states[self.state.conversation_id] = self.state.to_dict()
-        self.memory.set("conversation_states", conversation_states)
-        await self.memory.save()
+        # Slot fillers created later for this conversation read this copy
+        self.memory.set(_state_key(self.state.conversation_id), self.state.to_dict())
+        if self._save_task is None:
+            self._save_task = asyncio.get_running_loop().create_task(self._timed_save())
+    
+    async def _timed_save(self) -> bool:
+        """Save memory once the save interval has passed."""
+        await asyncio.sleep(_SAVE_INTERVAL)
+        # Detach first so messages arriving during the write start a new timer
+        self._save_task = None
+        return await self.memory.save()
     
     def get_filled_slots(self) -> Dict[str, Any]:
         """Get all filled slots.
@@ -120,7 +147,7 @@ class SlotFiller:
         """
         return self.state.get_all_slots()
     
-    def get_missing_required_slots(self) -> Set[str]:
+    def get_missing_required_slots(self) -> FrozenSet[str]:
         """Get the set of required slots that haven't been filled.
         
         Returns:
@@ -136,11 +163,11 @@ class SlotFiller:
         """
         return self.state.all_required_slots_filled()
     
-    def get_history(self) -> List[Dict[str, Any]]:
+    def get_history(self) -> Tuple[Dict[str, Any], ...]:
         """Get the conversation history.
         
         Returns:
-            List of messages in the conversation
+            Read-only sequence of messages in the conversation
         """
         return self.state.get_history()
     
@@ -150,10 +177,13 @@ class SlotFiller:
         Returns:
             bool: True if saved successfully, False otherwise
         """
+        if self._save_task is not None:
+            # This save covers whatever the timer would have written
+            self._save_task.cancel()
+            self._save_task = None
+        
         try:
-            conversation_states = self.memory.get("conversation_states", {})
-            conversation_states[self.state.conversation_id] = self.state.to_dict()
-            self.memory.set("conversation_states", conversation_states)
+            self.memory.set(_state_key(self.state.conversation_id), self.state.to_dict())
             return await self.memory.save()
         except Exception as e:
             logger.error(f"Error saving slot filler state: {e}")
@@ -187,9 +217,11 @@ class SlotFillerFactory:
         Returns:
             SlotFiller instance
         """
-        # Check if state already exists for this conversation
-        conversation_states = self.memory.get("conversation_states", {})
-        state_dict = conversation_states.get(conversation_id)
+        # Check if state already exists for this conversation, including
+        # state saved under the older shared "conversation_states" key
+        state_dict = self.memory.get(_state_key(conversation_id))
+        if state_dict is None:
+            state_dict = self.memory.get("conversation_states", {}).get(conversation_id)
         
         if state_dict:
             # Restore existing state
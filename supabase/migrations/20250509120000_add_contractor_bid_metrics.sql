@@ -0,0 +1,49 @@
+-- Migration: 20250509120000_add_contractor_bid_metrics.sql
+-- Description: Adds the contractor bid metrics table used by ContractorMemory
+-- and a patch function so saves only send the fields that changed
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS contractor_bid_metrics (
+    contractor_id TEXT PRIMARY KEY,
+    total_bids INTEGER NOT NULL DEFAULT 0,
+    successful_bids INTEGER NOT NULL DEFAULT 0,
+    avg_bid_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_bid_date TIMESTAMPTZ,
+    bid_history JSONB NOT NULL DEFAULT '{}',
+    win_rates JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Apply a partial update. Scalar keys present in p_patch overwrite their
+-- column; p_patch->'bid_history' is merged key-by-key into bid_history, so
+-- only the project types/categories that changed travel over the wire.
+CREATE OR REPLACE FUNCTION patch_bid_metrics(
+    p_contractor_id TEXT,
+    p_patch JSONB
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE contractor_bid_metrics
+    SET total_bids = COALESCE((p_patch->>'total_bids')::INTEGER, total_bids),
+        successful_bids = COALESCE((p_patch->>'successful_bids')::INTEGER, successful_bids),
+        avg_bid_amount = COALESCE((p_patch->>'avg_bid_amount')::DOUBLE PRECISION, avg_bid_amount),
+        last_bid_date = COALESCE((p_patch->>'last_bid_date')::TIMESTAMPTZ, last_bid_date),
+        bid_history = bid_history || COALESCE(p_patch->'bid_history', '{}'::JSONB),
+        updated_at = NOW()
+    WHERE contractor_id = p_contractor_id;
+$$;
+
+-- Enable Row Level Security
+ALTER TABLE contractor_bid_metrics ENABLE ROW LEVEL SECURITY;
+
+-- Add service role policies for system access
+CREATE POLICY "Service role can access all contractor bid metrics"
+    ON contractor_bid_metrics FOR ALL
+    TO service_role
+    USING (true);
+
+COMMIT;
@@ -0,0 +1,58 @@
+-- Migration: 20250510000000_add_contractor_win_rates.sql
+-- Description: Normalizes contractor win rates into per-dimension counter rows
+-- so recording a bid result writes O(3) rows instead of the whole metrics blob
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- One row per (contractor, dimension, value), e.g. ('c1', 'project_type', 'bathroom')
+CREATE TABLE IF NOT EXISTS contractor_win_rates (
+    contractor_id TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    bids INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (contractor_id, dimension, value)
+);
+
+-- Record one bid result: bump each dimension counter and the contractor's
+-- successful_bids in a single round trip.
+-- rows: [{"dim": "project_type", "val": "bathroom", "won": true}, ...]
+CREATE OR REPLACE FUNCTION increment_win_rates_batch(
+    p_contractor_id TEXT,
+    p_won BOOLEAN,
+    rows JSONB
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO contractor_win_rates (contractor_id, dimension, value, bids, wins)
+    SELECT
+        p_contractor_id,
+        r->>'dim',
+        r->>'val',
+        1,
+        CASE WHEN (r->>'won')::BOOLEAN THEN 1 ELSE 0 END
+    FROM jsonb_array_elements(rows) AS r
+    ON CONFLICT (contractor_id, dimension, value) DO UPDATE
+    SET bids = contractor_win_rates.bids + 1,
+        wins = contractor_win_rates.wins + EXCLUDED.wins,
+        updated_at = NOW();
+
+    UPDATE contractor_bid_metrics
+    SET successful_bids = successful_bids + CASE WHEN p_won THEN 1 ELSE 0 END,
+        updated_at = NOW()
+    WHERE contractor_id = p_contractor_id;
+$$;
+
+-- Enable Row Level Security
+ALTER TABLE contractor_win_rates ENABLE ROW LEVEL SECURITY;
+
+-- Add service role policies for system access
+CREATE POLICY "Service role can access all contractor win rates"
+    ON contractor_win_rates FOR ALL
+    TO service_role
+    USING (true);
+
+COMMIT;
@@ -0,0 +1,39 @@
+-- Migration: 20250511000000_add_contractor_total_bid_amount.sql
+-- Description: Tracks the running bid total on contractor_bid_metrics and
+-- derives avg_bid_amount from it instead of storing a re-averaged value
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+ALTER TABLE contractor_bid_metrics
+    ADD COLUMN IF NOT EXISTS total_bid_amount DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+-- Backfill from the stored average before it becomes a generated column
+UPDATE contractor_bid_metrics
+SET total_bid_amount = avg_bid_amount * total_bids;
+
+ALTER TABLE contractor_bid_metrics DROP COLUMN avg_bid_amount;
+
+ALTER TABLE contractor_bid_metrics
+    ADD COLUMN avg_bid_amount DOUBLE PRECISION
+    GENERATED ALWAYS AS (total_bid_amount / NULLIF(total_bids, 0)) STORED;
+
+-- avg_bid_amount can no longer be written; patch total_bid_amount instead
+CREATE OR REPLACE FUNCTION patch_bid_metrics(
+    p_contractor_id TEXT,
+    p_patch JSONB
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE contractor_bid_metrics
+    SET total_bids = COALESCE((p_patch->>'total_bids')::INTEGER, total_bids),
+        successful_bids = COALESCE((p_patch->>'successful_bids')::INTEGER, successful_bids),
+        total_bid_amount = COALESCE((p_patch->>'total_bid_amount')::DOUBLE PRECISION, total_bid_amount),
+        last_bid_date = COALESCE((p_patch->>'last_bid_date')::TIMESTAMPTZ, last_bid_date),
+        bid_history = bid_history || COALESCE(p_patch->'bid_history', '{}'::JSONB),
+        updated_at = NOW()
+    WHERE contractor_id = p_contractor_id;
+$$;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Migration: 20250512000000_add_user_memory_interactions_recent_idx.sql
+-- Description: Indexes user_memory_interactions for "most recent interactions
+-- for a user" queries, with and without an interaction type filter
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Serves: WHERE user_id = ? ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS user_memory_interactions_user_recent_idx
+    ON user_memory_interactions(user_id, created_at DESC);
+
+-- Serves: WHERE user_id = ? AND interaction_type = ? ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS user_memory_interactions_user_type_recent_idx
+    ON user_memory_interactions(user_id, interaction_type, created_at DESC);
+
+COMMIT;
@@ -0,0 +1,34 @@
+-- Migration: 20250512120000_add_conversation_messages.sql
+-- Description: Moves conversation history out of user_memories.memory_data
+-- into an append-only table, so adding a message writes one row instead of
+-- re-sending the whole history array
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS conversation_messages (
+    conversation_id TEXT NOT NULL,
+    seq BIGINT NOT NULL,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (conversation_id, seq),
+    FOREIGN KEY (user_id) REFERENCES user_memories(user_id) ON DELETE CASCADE
+);
+
+-- Enable Row Level Security
+ALTER TABLE conversation_messages ENABLE ROW LEVEL SECURITY;
+
+-- Create policies for user access
+CREATE POLICY "Users can only access their own conversation messages"
+    ON conversation_messages FOR ALL
+    USING (auth.uid()::text = user_id);
+
+-- Add service role policies for system access
+CREATE POLICY "Service role can access all conversation messages"
+    ON conversation_messages FOR ALL
+    TO service_role
+    USING (true);
+
+COMMIT;
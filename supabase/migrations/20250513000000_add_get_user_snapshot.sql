@@ -0,0 +1,42 @@
+-- Migration: 20250513000000_add_get_user_snapshot.sql
+-- Description: Adds get_user_snapshot so a user's preferences and recent
+-- interactions are fetched in one round trip
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Returns {"preferences": [...], "interactions": [...]}; interactions are
+-- newest first and served by user_memory_interactions_user[_type]_recent_idx.
+-- Runs with the caller's privileges, so row level security still applies.
+CREATE OR REPLACE FUNCTION get_user_snapshot(
+    p_user_id TEXT,
+    p_min_confidence DOUBLE PRECISION DEFAULT 0.5,
+    p_interaction_type TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'preferences', COALESCE((
+            SELECT jsonb_agg(p)
+            FROM user_preferences p
+            WHERE p.user_id = p_user_id
+              AND p.confidence >= p_min_confidence
+        ), '[]'::JSONB),
+        'interactions', COALESCE((
+            SELECT jsonb_agg(i ORDER BY i.created_at DESC)
+            FROM (
+                SELECT *
+                FROM user_memory_interactions
+                WHERE user_id = p_user_id
+                  AND (p_interaction_type IS NULL OR interaction_type = p_interaction_type)
+                ORDER BY created_at DESC
+                LIMIT p_limit
+            ) i
+        ), '[]'::JSONB)
+    );
+$$;
+
+COMMIT;
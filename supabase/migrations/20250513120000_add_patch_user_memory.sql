@@ -0,0 +1,25 @@
+-- Migration: 20250513120000_add_patch_user_memory.sql
+-- Description: Adds a patch function so PersistentMemory saves only send the
+-- top-level memory_data keys that changed
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Apply a partial update to memory_data: keys in p_unset are removed, then
+-- keys in p_set overwrite (or add) their top-level entry.
+CREATE OR REPLACE FUNCTION patch_user_memory(
+    p_user_id TEXT,
+    p_set JSONB,
+    p_unset TEXT[]
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE user_memories
+    SET memory_data = (memory_data - COALESCE(p_unset, '{}'::TEXT[]))
+            || COALESCE(p_set, '{}'::JSONB),
+        updated_at = NOW()
+    WHERE user_id = p_user_id;
+$$;
+
+COMMIT;
@@ -0,0 +1,18 @@
+-- Migration: 20250514000000_add_agent_messages_participants.sql
+-- Description: Indexes agent_messages by participant so "messages sent or
+-- received by an agent" is a single indexed predicate instead of an OR
+-- across sender_agent_id and recipient_agent_id
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Both ends of the message; maintained by Postgres, never written by clients
+ALTER TABLE agent_messages
+    ADD COLUMN IF NOT EXISTS participants TEXT[]
+    GENERATED ALWAYS AS (ARRAY[sender_agent_id, recipient_agent_id]) STORED;
+
+-- Serves: WHERE participants @> ARRAY[?]
+CREATE INDEX IF NOT EXISTS idx_agent_messages_participants
+    ON agent_messages USING GIN (participants);
+
+COMMIT;
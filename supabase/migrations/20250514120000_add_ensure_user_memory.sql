@@ -0,0 +1,29 @@
+-- Migration: 20250514120000_add_ensure_user_memory.sql
+-- Description: Adds ensure_user_memory so loading a user's memory creates the
+-- row when missing in the same round trip
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Return the user's memory_data, inserting an empty row first if none exists.
+-- Existing rows are only read; the statement snapshot means exactly one
+-- branch of the UNION ALL returns a row.
+CREATE OR REPLACE FUNCTION ensure_user_memory(
+    p_user_id TEXT
+)
+RETURNS JSONB
+LANGUAGE sql
+AS $$
+    WITH inserted AS (
+        INSERT INTO user_memories (user_id, memory_data)
+        VALUES (p_user_id, '{}'::JSONB)
+        ON CONFLICT (user_id) DO NOTHING
+        RETURNING memory_data
+    )
+    SELECT memory_data FROM inserted
+    UNION ALL
+    SELECT memory_data FROM user_memories WHERE user_id = p_user_id
+    LIMIT 1;
+$$;
+
+COMMIT;
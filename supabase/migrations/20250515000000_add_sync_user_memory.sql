@@ -0,0 +1,33 @@
+-- Migration: 20250515000000_add_sync_user_memory.sql
+-- Description: Adds sync_user_memory so PersistentMemory.save writes its
+-- memory_data patch and queued interactions in a single round trip
+
+-- Run inside a transaction for atomicity
+BEGIN;
+
+-- Apply a partial memory_data update (as patch_user_memory does) and insert
+-- the queued interactions. p_interactions is a JSON array of
+-- {"interaction_type": ..., "interaction_data": ...} objects. The memory row
+-- is created if missing so the interactions' foreign key always holds.
+CREATE OR REPLACE FUNCTION sync_user_memory(
+    p_user_id TEXT,
+    p_set JSONB,
+    p_unset TEXT[],
+    p_interactions JSONB
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO user_memories (user_id, memory_data)
+    VALUES (p_user_id, COALESCE(p_set, '{}'::JSONB))
+    ON CONFLICT (user_id) DO UPDATE
+    SET memory_data = (user_memories.memory_data - COALESCE(p_unset, '{}'::TEXT[]))
+            || COALESCE(p_set, '{}'::JSONB),
+        updated_at = NOW();
+
+    INSERT INTO user_memory_interactions (user_id, interaction_type, interaction_data)
+    SELECT p_user_id, item->>'interaction_type', item->'interaction_data'
+    FROM jsonb_array_elements(COALESCE(p_interactions, '[]'::JSONB)) AS item;
+$$;
+
+COMMIT;
@@ -249,7 +249,7 @@ async def test_create_bid_card_with_memory_e2e(mock_db, memory, vision_data):
         assert interactions[0]["data"]["category"] == "renovation"
         
         # Check that preferences were updated
-        pref = memory.get_preference("preferred_project_categories")
+        pref = await memory.get_preference("preferred_project_categories")
         assert pref == "renovation"
 
 
@@ -20,7 +20,7 @@ from src.a2a_types.core import Agent
 
 
 @pytest.mark.integration
-class TestMemoryIntegration(unittest.TestCase):
+class TestMemoryIntegration(unittest.IsolatedAsyncioTestCase):
     """Integration tests for memory with A2A communication."""
     
     @classmethod
@@ -30,7 +30,7 @@ class TestMemoryIntegration(unittest.TestCase):
         if not os.getenv("SUPABASE_URL") or not os.getenv("SUPABASE_KEY"):
             pytest.skip("Supabase credentials not set - skipping integration tests")
             
-    def setUp(self):
+    async def asyncSetUp(self):
         """Set up test environment before each test."""
         self.memory_manager = MemoryManager()
         # Generate unique user ID for each test
@@ -40,7 +40,7 @@ class TestMemoryIntegration(unittest.TestCase):
         self.agent2_id = "test-agent-2"
         
         # Initialize memory manager
-        assert self.memory_manager.initialize(), "Failed to initialize memory manager"
+        assert await self.memory_manager.initialize(), "Failed to initialize memory manager"
     
     async def test_user_memory_lifecycle(self):
         """Test creating, using, and deleting user memory."""
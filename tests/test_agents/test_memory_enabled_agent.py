@@ -50,7 +50,38 @@ async def agent(mock_db):
     return ConcreteMemoryEnabledAgent(mock_db)
 
 
+@pytest.fixture
+def mock_async_db():
+    """Async Supabase client mock whose execute() must be awaited."""
+    db = MagicMock()
+    db.rpc = MagicMock(return_value=db)
+    db.execute = AsyncMock(return_value=MagicMock(data={"context": {"project": "kitchen"}}))
+    return db
+
+
 class TestMemoryEnabledAgent:
+    @pytest.mark.asyncio
+    async def test_get_memory_with_async_client(self, mock_async_db):
+        agent = ConcreteMemoryEnabledAgent(mock_async_db)
+        
+        memory = await agent._get_memory("test-user-123")
+        
+        # The load RPC is awaited on the async client
+        assert memory._loaded is True
+        assert memory.get("context") == {"project": "kitchen"}
+        mock_async_db.rpc.assert_called_once()
+        assert mock_async_db.rpc.call_args[0][0] == "ensure_user_memory"
+        mock_async_db.execute.assert_awaited_once()
+        
+        # Changes are saved through the same client
+        memory.set("context", {"project": "bathroom"})
+        assert await memory.save() is True
+        assert mock_async_db.execute.await_count == 2
+        
+        # Later lookups reuse the loaded memory
+        assert await agent._get_memory("test-user-123") is memory
+        assert mock_async_db.execute.await_count == 2
+
     @patch('src.agents.memory_enabled_agent.PersistentMemory')
     async def test_ensure_memory(self, mock_memory_class, agent, mock_db):
         # Setup
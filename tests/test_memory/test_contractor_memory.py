@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.memory.contractor_memory import ContractorMemory
+
+
+class TestContractorMemory:
+    @pytest.fixture
+    def mock_db(self):
+        db = MagicMock()
+        db.table = MagicMock(return_value=db)
+        db.rpc = MagicMock(return_value=db)
+        db.execute = AsyncMock()
+        return db
+
+    @pytest_asyncio.fixture
+    async def memory(self, mock_db):
+        memory = ContractorMemory(mock_db, "test-contractor-123")
+        memory._is_loaded = True
+        memory._bid_metrics = {"successful_bids": 0}
+        return memory
+
+    @pytest.mark.asyncio
+    async def test_record_bid_result_awaits_interaction_when_lookup_fails(self, memory, mock_db):
+        memory.add_interaction = AsyncMock(side_effect=RuntimeError("write failed"))
+        memory._fetch_project = AsyncMock(side_effect=RuntimeError("lookup failed"))
+        tasks = []
+        
+        def track(coro):
+            task = asyncio.get_running_loop().create_task(coro)
+            tasks.append(task)
+            return task
+        
+        with patch("src.memory.contractor_memory.asyncio.create_task", side_effect=track):
+            assert await memory.record_bid_result("project-1", "bid-1", "accepted") is False
+        
+        # Both tasks finished and their failures were retrieved, so the event
+        # loop has no "Task exception was never retrieved" to report
+        assert len(tasks) == 2
+        assert all(task.done() and not task._log_traceback for task in tasks)
+        mock_db.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_record_bid_result_updates_win_rates(self, memory, mock_db):
+        memory.add_interaction = AsyncMock(return_value=True)
+        memory._fetch_project = AsyncMock(return_value={
+            "category": "remodel",
+            "location_description": "Denver",
+            "metadata": {"project_type": "kitchen"},
+        })
+        
+        assert await memory.record_bid_result("project-1", "bid-1", "accepted") is True
+        
+        assert memory._bid_metrics["successful_bids"] == 1
+        name, params = mock_db.rpc.call_args[0]
+        assert name == "increment_win_rates_batch"
+        assert [row["dim"] for row in params["rows"]] == ["project_type", "category", "location"]
@@ -1,4 +1,5 @@
 import pytest
+import pytest_asyncio
 import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -18,7 +19,7 @@ class TestPersistentMemory:
         db.insert = MagicMock(return_value=db)
         return db
 
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def memory(self, mock_db):
         memory = PersistentMemory(mock_db, "test-user-123")
         return memory
@@ -86,22 +87,85 @@ class TestPersistentMemory:
         mock_db.table.assert_called_with("user_memories")
         mock_db.upsert.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_save_writes_queued_interactions(self, memory, mock_db):
+        mock_db.rpc = MagicMock(return_value=mock_db)
+        memory._loaded = True
+        memory.set("context", {"project": "kitchen"})
+        await memory.add_interaction("conversation", {"message": "hi"})
+        
+        assert await memory.save() is True
+        
+        # Memory patch and interaction go out in one request
+        mock_db.rpc.assert_called_once()
+        name, params = mock_db.rpc.call_args[0]
+        assert name == "sync_user_memory"
+        assert params["p_set"] == {"context": {"project": "kitchen"}}
+        assert params["p_interactions"] == [
+            {"interaction_type": "conversation", "interaction_data": {"message": "hi"}}
+        ]
+        mock_db.insert.assert_not_called()
+        assert memory._pending_interactions == []
+
+    @pytest.mark.asyncio
     async def test_add_interaction(self, memory, mock_db):
-        memory._memory_cache = {"interactions": []}
-        memory._is_loaded = True
         interaction_data = {"project_type": "bathroom", "budget": "$5000-$10000"}
         
         result = await memory.add_interaction("project_creation", interaction_data)
         
         assert result is True
-        assert len(memory._memory_cache["interactions"]) == 1
-        assert memory._memory_cache["interactions"][0]["type"] == "project_creation"
-        assert memory._memory_cache["interactions"][0]["data"] == interaction_data
-        assert memory._is_dirty is True
         
-        # Verify database calls
+        # The row is queued rather than inserted straight away
+        assert memory._pending_interactions == [{
+            "user_id": memory._user_uuid,
+            "interaction_type": "project_creation",
+            "interaction_data": interaction_data
+        }]
+        mock_db.insert.assert_not_called()
+        
+        # The memory blob is untouched; interactions live in their own table
+        assert memory._dirty is False
+        memory._flush_task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_add_interaction_flushes_in_batches(self, memory, mock_db):
+        for i in range(32):
+            assert await memory.add_interaction("conversation", {"message": i}) is True
+        
+        # One insert once the batch is full
         mock_db.table.assert_called_with("user_memory_interactions")
         mock_db.insert.assert_called_once()
+        rows = mock_db.insert.call_args[0][0]
+        assert [row["interaction_data"]["message"] for row in rows] == list(range(32))
+
+    @pytest.mark.asyncio
+    async def test_add_interaction_flushes_after_interval(self, memory, mock_db):
+        with patch("src.memory.persistent_memory._INTERACTION_FLUSH_INTERVAL", 0):
+            assert await memory.add_interaction("conversation", {"message": "hi"}) is True
+            mock_db.insert.assert_not_called()
+            
+            await memory._flush_task
+        
+        # The queued row is inserted without waiting for a save
+        mock_db.insert.assert_called_once()
+        assert memory._pending_interactions == []
+
+    @pytest.mark.asyncio
+    async def test_add_interactions_bulk(self, memory, mock_db):
+        interactions = [
+            ("conversation", {"message": "hi"}),
+            ("project_creation", {"project_type": "bathroom"}),
+        ]
+        
+        result = await memory.add_interactions_bulk(interactions)
+        
+        assert result is True
+        
+        # One insert for the whole batch
+        mock_db.table.assert_called_with("user_memory_interactions")
+        mock_db.insert.assert_called_once()
+        rows = mock_db.insert.call_args[0][0]
+        assert [row["interaction_type"] for row in rows] == ["conversation", "project_creation"]
 
     async def test_memory_interface_methods(self, memory):
         # Test get/set methods
@@ -119,48 +183,78 @@ class TestPersistentMemory:
         memory._is_loaded = False
         assert memory.get("user_name") is None
 
-    async def test_get_recent_interactions(self, memory):
-        memory._is_loaded = True
-        memory._memory_cache = {
-            "interactions": [
-                {"type": "login", "timestamp": "2025-05-01T10:00:00", "data": {}},
-                {"type": "project_creation", "timestamp": "2025-05-01T11:00:00", "data": {}},
-                {"type": "login", "timestamp": "2025-05-01T12:00:00", "data": {}}
-            ]
-        }
+    @pytest.mark.asyncio
+    async def test_set_unchanged_value_stays_clean(self, memory):
+        memory._loaded = True
+        memory._data = {"context": {"project": "kitchen"}}
         
-        # Test getting all interactions
-        interactions = memory.get_recent_interactions()
-        assert len(interactions) == 3
-        assert interactions[0]["timestamp"] == "2025-05-01T12:00:00"  # Most recent first
+        memory.set("context", {"project": "kitchen"})
+        assert memory._dirty is False
         
-        # Test filtering by type
-        login_interactions = memory.get_recent_interactions(interaction_type="login")
-        assert len(login_interactions) == 2
+        # An in-place change set back under the same key is still saved
+        context = memory.get("context")
+        context["project"] = "bathroom"
+        memory.set("context", context)
+        assert memory._dirty is True
+        assert memory._changed_keys == {"context"}
+
+    @pytest.mark.asyncio
+    async def test_get_recent_interactions(self, memory, mock_db):
+        mock_db.order = MagicMock(return_value=mock_db)
+        mock_db.limit = MagicMock(return_value=mock_db)
+        mock_db.execute.return_value.data = [
+            {"interaction_type": "login", "interaction_data": {"device": "web"}, "created_at": "2025-05-01T12:00:00"},
+            {"interaction_type": "login", "interaction_data": {}, "created_at": "2025-05-01T10:00:00"}
+        ]
+        
+        interactions = await memory.get_recent_interactions(interaction_type="login", limit=2)
         
-        # Test limiting
-        limited = memory.get_recent_interactions(limit=1)
-        assert len(limited) == 1
-        assert limited[0]["timestamp"] == "2025-05-01T12:00:00"
+        assert interactions == [
+            {"type": "login", "data": {"device": "web"}, "timestamp": "2025-05-01T12:00:00"},
+            {"type": "login", "data": {}, "timestamp": "2025-05-01T10:00:00"}
+        ]
+        
+        # Filtering, ordering and the limit are all done by the query
+        mock_db.table.assert_called_with("user_memory_interactions")
+        mock_db.eq.assert_any_call("user_id", memory._user_uuid)
+        mock_db.eq.assert_any_call("interaction_type", "login")
+        mock_db.order.assert_called_once_with("created_at", desc=True)
+        mock_db.limit.assert_called_once_with(2)
 
-    async def test_preferences(self, memory):
-        memory._is_loaded = True
-        memory._memory_cache = {
-            "learned_preferences": {
-                "preferred_project_types": {"value": "bathroom", "count": 3},
-                "timeline_preference": {"value": "1-3 months", "count": 1}
-            }
-        }
+    @pytest.mark.asyncio
+    async def test_preferences(self, memory, mock_db):
+        mock_db.gte = MagicMock(return_value=mock_db)
         
         # Test getting a preference
-        assert memory.get_preference("preferred_project_types") == "bathroom"
-        assert memory.get_preference("non_existent") is None
+        mock_db.execute.return_value.data = {"preference_value": "bathroom"}
+        assert await memory.get_preference("preferred_project_types") == "bathroom"
+        mock_db.execute.return_value.data = None
+        assert await memory.get_preference("non_existent") is None
         
         # Test getting all preferences
-        all_prefs = memory.get_all_preferences()
-        assert len(all_prefs) == 2
-        assert all_prefs["preferred_project_types"] == "bathroom"
-        assert all_prefs["timeline_preference"] == "1-3 months"
+        mock_db.execute.return_value.data = [
+            {"preference_key": "preferred_project_types", "preference_value": "bathroom"},
+            {"preference_key": "timeline_preference", "preference_value": "1-3 months"}
+        ]
+        all_prefs = await memory.get_all_preferences()
+        assert all_prefs == {
+            "preferred_project_types": "bathroom",
+            "timeline_preference": "1-3 months"
+        }
+        mock_db.gte.assert_called_once_with("confidence", 0.0)
+
+    @pytest.mark.asyncio
+    async def test_preference_reads_are_cached(self, memory, mock_db):
+        mock_db.execute.return_value.data = {"preference_value": "1-3 months"}
+        
+        assert await memory.get_preference("timeline_preference") == "1-3 months"
+        assert await memory.get_preference("timeline_preference") == "1-3 months"
+        assert mock_db.execute.await_count == 1
+        
+        # set_preference writes through to the cache
+        assert await memory.set_preference("timeline_preference", "3-6 months") is True
+        assert await memory.get_preference("timeline_preference") == "3-6 months"
+        assert mock_db.execute.await_count == 2
 
     async def test_extract_preferences(self, memory, mock_db):
         memory._is_loaded = True
@@ -5,7 +5,7 @@ Unit tests for the integrated memory module.
 
 import unittest
 import asyncio
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
 
 from src.memory.integrated_memory import IntegratedMemory
@@ -217,10 +217,10 @@ class TestIntegratedMemory(unittest.TestCase):
         # Verify result
         self.assertTrue(result)
         self.assertTrue(self.memory._is_loaded)
-        self.assertTrue(self.memory._is_dirty)
+        self.assertFalse(self.memory._is_dirty)
         
-        # Verify database insert was called
-        self.mock_db.table().upsert.assert_called_once()
+        # Verify the row is not written until the first mutation is saved
+        self.mock_db.table().upsert.assert_not_called()
     
     @patch("src.memory.integrated_memory.datetime")
     async def test_save(self, mock_datetime):
@@ -257,6 +257,76 @@ class TestIntegratedMemory(unittest.TestCase):
         self.assertIn("memory_data", args)
         self.assertIn("updated_at", args)
 
+    
+    def test_record_agent_message_creates_memory_row(self):
+        """Test that a new user's memory row is created before queued rows are inserted."""
+        # New user: loaded, nothing persisted and nothing dirty
+        self.memory._is_loaded = True
+        table = self.mock_db.table.return_value
+        table.upsert.return_value.execute = AsyncMock()
+        
+        result = asyncio.run(self.memory.record_agent_message(
+            "msg-1", "task-1", "agent-a", "agent-b", "Hello", "user"
+        ))
+        
+        self.assertTrue(result)
+        self.assertTrue(self.memory._is_persisted)
+        # The memory row first, then the message and interaction rows
+        self.assertEqual(table.upsert.call_count, 3)
+        self.assertEqual(table.upsert.call_args_list[0][1]["ignore_duplicates"], True)
+        self.assertEqual(self.memory._pending_interactions, [])
+    
+    def test_record_agent_message_keeps_rows_when_row_creation_fails(self):
+        """Test that queued rows are kept and failure reported if the memory row can't be created."""
+        self.memory._is_loaded = True
+        table = self.mock_db.table.return_value
+        table.upsert.return_value.execute = AsyncMock(side_effect=Exception("unavailable"))
+        
+        result = asyncio.run(self.memory.record_agent_message(
+            "msg-1", "task-1", "agent-a", "agent-b", "Hello", "user"
+        ))
+        
+        self.assertFalse(result)
+        # Only the memory row was attempted
+        table.upsert.assert_called_once()
+        self.assertEqual(len(self.memory._pending_interactions), 1)
+        self.assertEqual(len(self.memory._pending_messages), 1)
+    
+    def test_failed_flush_requeues_rows_with_their_ids(self):
+        """Test that rows of a failed table are retried with the same ids on the next flush."""
+        self.memory._is_loaded = True
+        self.memory._is_persisted = True
+        tables = {}
+        
+        def table(name):
+            if name not in tables:
+                tables[name] = MagicMock()
+                tables[name].upsert.return_value.execute = AsyncMock()
+            return tables[name]
+        
+        self.mock_db.table.side_effect = table
+        table("message_routing_logs").upsert.return_value.execute.side_effect = [
+            Exception("unavailable"), None
+        ]
+        
+        async def record_twice():
+            first = await self.memory.record_message_routing(
+                "msg-1", "task-1", "agent-a", "agent-b", "delivered"
+            )
+            return first, await self.memory._flush_pending()
+        
+        first, retried = asyncio.run(record_twice())
+        
+        self.assertFalse(first)
+        self.assertTrue(retried)
+        self.assertEqual(self.memory._pending_routing, [])
+        # Both attempts upserted the same row on its client-generated id
+        calls = tables["message_routing_logs"].upsert.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0][0][0], calls[1][0][0])
+        self.assertTrue(calls[0][0][0][0]["id"])
+        self.assertEqual(calls[1][1]["on_conflict"], "id")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+"""
+Tests for LLMAgent's buffered memory interaction writes.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from instabids.memory.persistent_memory import PersistentMemory
+from instabids_google.adk.llm_agent import LLMAgent
+
+
+@pytest.fixture
+def mock_db():
+    """Mock Supabase client whose table queries chain back to one mock."""
+    db = MagicMock()
+    db.table.return_value = db
+    db.insert.return_value = db
+    return db
+
+
+@pytest.mark.asyncio
+async def test_buffered_interactions_are_written_in_one_insert(mock_db):
+    """Interactions recorded inside a buffered block go out as one bulk insert."""
+    agent = LLMAgent("test-agent", memory=PersistentMemory(mock_db, "user-123"))
+
+    async with agent.buffered_interactions(batch_size=10, flush_interval=60):
+        await agent._record_interaction("conversation", {"message": "hi"})
+        await agent._record_interaction("conversation", {"message": "bye"})
+        mock_db.insert.assert_not_called()
+
+    mock_db.table.assert_called_with("user_memory_interactions")
+    mock_db.insert.assert_called_once()
+    rows = mock_db.insert.call_args[0][0]
+    assert [row["interaction_data"]["message"] for row in rows] == ["hi", "bye"]
+    assert all(row["user_id"] == "user-123" for row in rows)
+    assert all(row["interaction_type"] == "conversation" for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_when_batch_is_full(mock_db):
+    """A full buffer is flushed without waiting for the block to exit."""
+    agent = LLMAgent("test-agent", memory=PersistentMemory(mock_db, "user-123"))
+
+    async with agent.buffered_interactions(batch_size=2, flush_interval=60):
+        await agent._record_interaction("conversation", {"message": "hi"})
+        await agent._record_interaction("conversation", {"message": "bye"})
+        mock_db.insert.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_unbuffered_interaction_is_written_immediately(mock_db):
+    """Outside a buffered block each interaction is inserted straight away."""
+    agent = LLMAgent("test-agent", memory=PersistentMemory(mock_db, "user-123"))
+
+    await agent._record_interaction("conversation", {"message": "hi"})
+
+    rows = mock_db.insert.call_args[0][0]
+    assert rows == [{
+        "user_id": "user-123",
+        "interaction_type": "conversation",
+        "interaction_data": {"message": "hi"}
+    }]